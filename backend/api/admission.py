@@ -0,0 +1,158 @@
+# backend/api/admission.py
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from functools import wraps
+import math
+import threading
+import time
+
+
+class ServiceUnavailable(APIException):
+    """503 with Retry-After (DRF's exception handler sets it from `wait`)"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many requests in progress. Please try again shortly.'
+    default_code = 'service_unavailable'
+
+    def __init__(self, wait, detail=None):
+        super().__init__(detail)
+        self.wait = wait
+
+
+class ResourceLimiter:
+    """
+    Concurrency limit with a bounded wait queue for one upstream resource.
+
+    Up to `concurrency` callers run at once; up to `queue` more may wait
+    (for at most `timeout` seconds). Anyone beyond that is turned away
+    immediately instead of piling up in worker threads.
+    """
+
+    def __init__(self, name, concurrency, queue, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.max_waiting = queue
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def acquire(self, timeout=None):
+        """Take a slot; False if the queue is full or the wait timed out"""
+        if self._slots.acquire(blocking=False):
+            return True
+
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                return False
+            self._waiting += 1
+        try:
+            return self._slots.acquire(timeout=self.timeout if timeout is None else timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def acquire_idle(self):
+        """
+        Take a free slot only if nobody is queued for one - for background
+        work (bulk imports) that must not get ahead of interactive callers
+        """
+        with self._lock:
+            if self._waiting:
+                return False
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name):
+    """Per-process limiter for a resource configured in ADMISSION_LIMITS"""
+    with _limiters_lock:
+        if name not in _limiters:
+            config = settings.ADMISSION_LIMITS[name]
+            _limiters[name] = ResourceLimiter(name, config['concurrency'], config['queue'], config['timeout'])
+        return _limiters[name]
+
+
+def check_rate(key):
+    """
+    Fixed-window rate limit shared through the cache.
+
+    Raises:
+        Throttled: (429 with Retry-After) when the key is over its limit
+    """
+    limit = settings.PATIENT_RATE_LIMIT['requests']
+    window = settings.PATIENT_RATE_LIMIT['window']
+
+    now = time.time()
+    window_start = int(now // window) * window
+    cache_key = f"ratelimit:{key}:{window_start}"
+
+    cache.add(cache_key, 0, window + 1)
+    try:
+        count = cache.incr(cache_key)
+    except ValueError:
+        # Expired between add and incr - start the window again
+        cache.set(cache_key, 1, window + 1)
+        count = 1
+
+    if count > limit:
+        raise Throttled(wait=math.ceil(window_start + window - now))
+
+
+class HeldSlot:
+    """
+    Response iterable that holds a limiter slot until the streaming response
+    is closed - after the last chunk, on error, or when the client goes
+    away (StreamingHttpResponse calls close() in every case).
+    """
+
+    def __init__(self, limiter, iterable):
+        self._limiter = limiter
+        self._iterable = iterable
+        self._released = False
+
+    def __iter__(self):
+        return iter(self._iterable)
+
+    def close(self):
+        try:
+            close = getattr(self._iterable, 'close', None)
+            if close:
+                close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._limiter.release()
+
+
+def admit(resource, rate_key=None):
+    """
+    View decorator (place under @api_view): per-caller rate limit, then
+    hold a slot of `resource` for the duration of the view.
+
+    Args:
+        resource: Key in settings.ADMISSION_LIMITS
+        rate_key: Request field to rate limit on (e.g. 'patient_id')
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if rate_key and request.data.get(rate_key):
+                check_rate(f"{rate_key}:{request.data.get(rate_key)}")
+
+            limiter = get_limiter(resource)
+            if not limiter.acquire():
+                raise ServiceUnavailable(wait=math.ceil(limiter.timeout))
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                limiter.release()
+        return wrapper
+    return decorator
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.api'
+
+    def ready(self):
+        from django.conf import settings
+        from .tracing import start_trace_logging
+        start_trace_logging()
+
+        # Heavy services load lazily; workers that need them can opt in here
+        if settings.WARMUP_SERVICES:
+            from .warmup import warm_up_in_background
+            warm_up_in_background(settings.WARMUP_SERVICES)
@@ -0,0 +1,78 @@
+# backend/api/conditional.py
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from rest_framework import status
+from datetime import datetime
+import hashlib
+import json
+
+
+def compute_etag(version_rows, representation=''):
+    """
+    Strong ETag over the rows that identify a resource's version, and over
+    the representation (e.g. the select list picked with ?fields=) - a
+    sparse and a full body of the same rows must not share an ETag
+    """
+    payload = json.dumps([representation, version_rows], sort_keys=True, default=str)
+    return quote_etag(hashlib.sha1(payload.encode()).hexdigest())
+
+
+def last_modified_from(version_rows, field='updated_at'):
+    """Latest timestamp among the rows, as a unix timestamp (or None)"""
+    latest = None
+    for row in version_rows:
+        value = row.get(field) or row.get('created_at')
+        if not value:
+            continue
+        try:
+            timestamp = int(datetime.fromisoformat(value).timestamp())
+        except (TypeError, ValueError):
+            continue
+        if latest is None or timestamp > latest:
+            latest = timestamp
+    return latest
+
+
+def _set_cache_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+    # Patient data - browsers may keep it, shared caches may not
+    max_age = settings.API_CACHE_MAX_AGE
+    if max_age:
+        patch_cache_control(response, private=True, max_age=max_age)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(request, version_rows, build_body, representation='', collection=True):
+    """
+    Answer a GET with 304 Not Modified when the client's copy is current.
+
+    Args:
+        request: DRF request (If-None-Match / If-Modified-Since are read from it)
+        version_rows: Small rows (ids + updated_at) identifying the current version
+        build_body: Callable producing the full response body; only called on a miss
+        representation: What the body contains beyond the version rows - the
+            normalized select list for endpoints that take ?fields=
+        collection: The rows are a list endpoint's members. Deleting one doesn't
+            move the newest timestamp, so lists get no Last-Modified and are
+            validated by ETag alone (the ETag covers the ids)
+
+    Returns:
+        304 response, or 200 response with the built body, both carrying
+        ETag and Cache-Control headers (and Last-Modified for single resources)
+    """
+    etag = compute_etag(version_rows, representation)
+    last_modified = None if collection else last_modified_from(version_rows)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _set_cache_headers(not_modified, etag, last_modified)
+
+    return _set_cache_headers(Response(build_body(), status=status.HTTP_200_OK), etag, last_modified)
@@ -0,0 +1,70 @@
+# backend/api/fields.py
+
+# Columns clients may ask for with ?fields=, per table
+TABLE_FIELDS = {
+    'family_members': (
+        'id', 'user_id', 'patient_id', 'name', 'email', 'relationship',
+        'profile_photo_url', 'profile_photo_thumb_url', 'profile_photo_screen_url', 'voice_sample_url', 'voice_clone_status',
+        'created_at', 'updated_at',
+    ),
+    'memories': (
+        'id', 'family_member_id', 'title', 'content', 'audio_url',
+        'created_at', 'updated_at',
+    ),
+    'family_videos': (
+        'id', 'family_member_id', 'patient_id', 'title', 'description',
+        'video_url', 'thumbnail_url', 'file_size_mb', 'created_at', 'updated_at',
+    ),
+}
+
+# Columns the patient screens use - patient endpoints don't send whole rows
+PATIENT_MEMBER_FIELDS = ('id', 'name', 'relationship', 'profile_photo_url', 'profile_photo_thumb_url')
+PATIENT_MEMORY_SELECT = 'id, family_member_id, title, content, audio_url, created_at, photos:memory_photos (id, photo_url, thumb_url, screen_url)'
+
+
+def public_member(member):
+    """Member as sent to the patient (no email, voice sample, ...)"""
+    return {field: member.get(field) for field in PATIENT_MEMBER_FIELDS}
+
+
+def parse_fields(request, table, embeds=()):
+    """
+    Columns requested with ?fields=a,b,c
+
+    Args:
+        request: DRF request
+        table: Key in TABLE_FIELDS
+        embeds: Names of embedded resources the endpoint can include (e.g. 'photos')
+
+    Returns:
+        (columns tuple or None for all, set of requested embeds - all if no fields=)
+
+    Raises:
+        ValueError: on an unknown field name
+    """
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None, set(embeds)
+
+    allowed = TABLE_FIELDS[table]
+    columns = []
+    requested_embeds = set()
+    for name in (part.strip() for part in raw.split(',')):
+        if not name:
+            continue
+        if name in embeds:
+            requested_embeds.add(name)
+        elif name in allowed:
+            if name not in columns:
+                columns.append(name)
+        else:
+            raise ValueError(f"Unknown field: {name}")
+    return tuple(columns), requested_embeds
+
+
+def select_clause(columns, required=()):
+    """Supabase select list for the columns (plus any the view needs itself)"""
+    if columns is None:
+        return '*'
+    selected = list(columns) + [name for name in required if name not in columns]
+    return ', '.join(selected) or 'id'
@@ -0,0 +1,105 @@
+# backend/api/idempotency.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from functools import wraps
+import hashlib
+import json
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyConflict(APIException):
+    """409 with Retry-After - the original request is still running"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still in progress. Please retry shortly.'
+    default_code = 'idempotency_conflict'
+
+    def __init__(self, wait, detail=None):
+        super().__init__(detail)
+        self.wait = wait
+
+
+def request_fingerprint(request):
+    """Hash of the request's fields (uploaded files by name and size, not content)"""
+    data = request.data
+    items = data.lists() if hasattr(data, 'lists') else ((k, [v]) for k, v in data.items())
+
+    parts = []
+    for name, values in items:
+        for value in values:
+            if isinstance(value, UploadedFile):
+                value = f"file:{value.name}:{value.size}"
+            parts.append((name, value))
+    payload = json.dumps(sorted(parts, key=lambda part: part[0]), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(entry):
+    response = Response(entry['data'], status=entry['status'])
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def idempotent(view):
+    """
+    View decorator (place under @api_view, above @admit): honour an
+    Idempotency-Key header so client retries don't repeat the work.
+
+    The first request with a key claims it in the cache and runs; its
+    response (anything but a 5xx) is stored for IDEMPOTENCY_TTL. A repeat
+    gets the stored response, or - while the first is still running - an
+    immediate 409 with Retry-After (it doesn't hold a worker waiting).
+    Reusing a key with a different payload is a 422. Requests without the
+    header are unaffected.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+
+        cache_key = f"idempotency:{view.__name__}:{hashlib.sha256(key.encode()).hexdigest()}"
+        fingerprint = request_fingerprint(request)
+
+        # Atomic claim (cache.add only sets a missing key - also across processes with Redis)
+        if not cache.add(cache_key, {'state': 'running', 'fingerprint': fingerprint}, settings.IDEMPOTENCY_LOCK_TTL):
+            while True:
+                entry = cache.get(cache_key)
+                if entry is None:
+                    # Original failed and released the key - this request runs instead
+                    if cache.add(cache_key, {'state': 'running', 'fingerprint': fingerprint}, settings.IDEMPOTENCY_LOCK_TTL):
+                        break
+                    continue
+                if entry['fingerprint'] != fingerprint:
+                    return Response(
+                        {'error': f'{HEADER} was already used with a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if entry['state'] == 'done':
+                    return _replay(entry)
+                raise IdempotencyConflict(wait=settings.IDEMPOTENCY_RETRY_AFTER)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code >= 500:
+            # Let a retry run the operation again
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, {
+                'state': 'done',
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'data': response.data,
+            }, settings.IDEMPOTENCY_TTL)
+        return response
+    return wrapper
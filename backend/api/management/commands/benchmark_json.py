@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from backend.api.renderers import FastJSONRenderer
+from datetime import datetime, timedelta, timezone
+import gzip
+import time
+import uuid
+
+SPARSE_FIELDS = ('id', 'title', 'audio_url', 'created_at')
+
+
+def _memory_list(count, photos_per_memory):
+    """Rows shaped like get_memories output (memories + embedded photos)"""
+    member_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    memories = []
+    for i in range(count):
+        memory_id = str(uuid.uuid4())
+        created = (now - timedelta(days=i)).isoformat()
+        memories.append({
+            'id': memory_id,
+            'family_member_id': member_id,
+            'title': f"Memory {i}: a day at the lake",
+            'content': "We packed sandwiches and drove to the lake, where you showed the kids how to skip stones. " * 4,
+            'audio_url': f"https://example.supabase.co/storage/v1/object/public/memory-audio/memory-audio/{memory_id}.wav",
+            'created_at': created,
+            'updated_at': created,
+            'photos': [
+                {
+                    'id': str(uuid.uuid4()),
+                    'memory_id': memory_id,
+                    'photo_url': f"https://example.supabase.co/storage/v1/object/public/profiles/memory-photos/{memory_id}_{p}.jpg",
+                    'created_at': created,
+                    'updated_at': created,
+                }
+                for p in range(photos_per_memory)
+            ],
+        })
+    return memories
+
+
+class Command(BaseCommand):
+    help = "Benchmark JSON rendering time and payload size for large memory lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--memories', type=int, default=1000)
+        parser.add_argument('--photos', type=int, default=3, help="Photos per memory")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        full = _memory_list(options['memories'], options['photos'])
+        sparse = [{field: memory[field] for field in SPARSE_FIELDS} for memory in full]
+
+        self.stdout.write(f"{options['memories']} memories x {options['photos']} photos, {options['repeat']} renders each\n")
+        for payload_name, payload in (('full rows', full), (f"fields={','.join(SPARSE_FIELDS)}", sparse)):
+            for renderer in (JSONRenderer(), FastJSONRenderer()):
+                body = renderer.render(payload)
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    renderer.render(payload)
+                per_render_ms = (time.perf_counter() - start) * 1000 / options['repeat']
+
+                self.stdout.write(
+                    f"{payload_name:<40} {type(renderer).__name__:<18} "
+                    f"{per_render_ms:7.2f}ms  {len(body) / 1024:8.1f}KB  ({len(gzip.compress(body)) / 1024:.1f}KB gzip)"
+                )
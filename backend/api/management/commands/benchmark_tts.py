@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+import io
+import time
+import wave
+
+BENCHMARK_TEXTS = [
+    "We spent the whole afternoon at the beach, building sandcastles until the tide came in.",
+    "Do you remember the blue bicycle you taught me to ride on Maple Street?",
+    "Every Sunday you made pancakes, and the kitchen smelled of butter and cinnamon.",
+    "Your granddaughter Emma started school this week. She loves her new teacher.",
+    "We danced in the living room to your favourite record after dinner.",
+    "The garden is blooming again. The roses you planted are as tall as the fence.",
+    "Last summer we drove to the lake and watched the sunset from the old pier.",
+    "You always said the best part of the holidays was having everyone at one table.",
+]
+
+
+def _duration(audio: bytes):
+    with wave.open(io.BytesIO(audio), "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+class Command(BaseCommand):
+    help = "Measure TTS throughput (seconds of audio per wall-clock second) on this host"
+
+    def add_arguments(self, parser):
+        parser.add_argument('voice_sample_url', help="URL of a voice sample to clone")
+        parser.add_argument('--texts', type=int, default=len(BENCHMARK_TEXTS), help="Number of texts to synthesize")
+        parser.add_argument('--threads', type=int, help="torch intra-op threads")
+        parser.add_argument('--interop-threads', type=int, help="torch inter-op threads")
+        parser.add_argument('--affinity', help='CPU list to pin the process to, e.g. "0-3"')
+        parser.add_argument('--mode', choices=['batch', 'single', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        # Thread/affinity settings are applied when the model loads
+        if options['threads']:
+            settings.TTS_INTRA_OP_THREADS = options['threads']
+        if options['interop_threads']:
+            settings.TTS_INTER_OP_THREADS = options['interop_threads']
+        if options['affinity']:
+            settings.TTS_CPU_AFFINITY = options['affinity']
+
+        from backend.api.services import voice_service
+        load_start = time.perf_counter()
+        voice_service.get_tts()
+        import torch
+        self.stdout.write(
+            f"Model load: {time.perf_counter() - load_start:.1f}s "
+            f"(intra-op threads: {torch.get_num_threads()}, inter-op threads: {torch.get_num_interop_threads()})"
+        )
+
+        texts = [BENCHMARK_TEXTS[i % len(BENCHMARK_TEXTS)] for i in range(options['texts'])]
+        url = options['voice_sample_url']
+
+        # Warm-up so one-off initialisation doesn't count against either mode
+        voice_service.generate_audio_batch(texts[:1], url)
+
+        if options['mode'] in ('single', 'both'):
+            start = time.perf_counter()
+            audio_seconds = 0.0
+            for text in texts:
+                result = voice_service.generate_audio_from_text(text, url)
+                if result['error']:
+                    raise Exception(result['error'])
+                audio_seconds += _duration(result['audio'])
+            self._report('single', len(texts), audio_seconds, time.perf_counter() - start)
+
+        if options['mode'] in ('batch', 'both'):
+            start = time.perf_counter()
+            result = voice_service.generate_audio_batch(texts, url)
+            if result['error']:
+                raise Exception(result['error'])
+            audio_seconds = sum(r['duration'] for r in result['results'])
+            self._report('batch', len(texts), audio_seconds, time.perf_counter() - start)
+
+    def _report(self, mode, count, audio_seconds, wall_seconds):
+        self.stdout.write(
+            f"{mode:>6}: {count} texts, {audio_seconds:.1f}s audio in {wall_seconds:.1f}s "
+            f"-> {audio_seconds / wall_seconds:.2f}s audio per second"
+        )
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from backend.api.services.supabase_client import supabase
+from backend.api.services.daily_bundle_service import build_daily_bundle
+
+
+class Command(BaseCommand):
+    help = "Precompute each patient's daily bundle (run nightly, e.g. `0 3 * * *` from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('patient_ids', nargs='*', help="Patient IDs (default: every patient)")
+        parser.add_argument('--date', help="Day to build, YYYY-MM-DD (default: today)")
+        parser.add_argument('--workers', type=int, default=settings.DAILY_BUNDLE_WORKERS)
+        parser.add_argument('--no-gemini', action='store_true', help="Use the template greeting")
+        parser.add_argument('--keep-days', type=int, default=7, help="Delete bundles older than this")
+
+    def handle(self, *args, **options):
+        day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+
+        patient_ids = options['patient_ids']
+        if not patient_ids:
+            result = supabase.table('patients').select('id').execute()
+            patient_ids = [row['id'] for row in result.data or []]
+
+        use_gemini = not options['no_gemini']
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            results = executor.map(lambda patient_id: build_daily_bundle(patient_id, day, use_gemini), patient_ids)
+
+            failed = 0
+            for patient_id, result in zip(patient_ids, results):
+                if result['error']:
+                    failed += 1
+                    self.stderr.write(f"{patient_id}: {result['error']}")
+                else:
+                    self.stdout.write(f"{patient_id}: {len(result['bundle']['memories'])} memories")
+
+        cutoff = day - timedelta(days=options['keep_days'])
+        supabase.table('daily_bundles').delete().lt('bundle_date', cutoff.isoformat()).execute()
+
+        self.stdout.write(f"{len(patient_ids) - failed}/{len(patient_ids)} bundles built for {day.isoformat()}")
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import json
+import os
+import subprocess
+import sys
+
+# Modules that must not be imported just by loading the app
+HEAVY_MODULES = ('torch', 'TTS', 'google.generativeai', 'PIL')
+
+CHILD = """
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+import django
+django.setup()
+import backend.urls
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({'elapsed_ms': elapsed_ms, 'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+class Command(BaseCommand):
+    help = "Measure app import time in a fresh interpreter and enforce STARTUP_BUDGET_MS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=int, default=settings.STARTUP_BUDGET_MS)
+        parser.add_argument('--top', type=int, default=10, help="Slowest top-level imports to list")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, WARMUP_SERVICES='')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise CommandError(f"App failed to import:\n{result.stderr[-2000:]}")
+
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        # -X importtime lines: "import time: self [us] | cumulative | imported package"
+        top_level = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not name.startswith('  '):  # nested imports are indented further
+                top_level.append((int(cumulative), name.strip()))
+        top_level.sort(reverse=True)
+
+        self.stdout.write(f"App import: {report['elapsed_ms']:.0f}ms (budget {options['budget_ms']}ms)")
+        for cumulative, name in top_level[:options['top']]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+        problems = []
+        if report['heavy']:
+            problems.append(f"heavy modules imported at start-up: {', '.join(report['heavy'])}")
+        if report['elapsed_ms'] > options['budget_ms']:
+            problems.append(f"import took {report['elapsed_ms']:.0f}ms, over the {options['budget_ms']}ms budget")
+        if problems:
+            raise CommandError("; ".join(problems))
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from .benchmark_tts import BENCHMARK_TEXTS, _duration
+
+
+class Command(BaseCommand):
+    help = (
+        "Synthesize texts of very different lengths from concurrent threads and "
+        "check each caller gets its own audio (durations must follow text length)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('voice_sample_url', help="URL of a voice sample to clone")
+        parser.add_argument('--threads', type=int, default=4)
+
+    def handle(self, *args, **options):
+        from backend.api.services.voice_service import generate_audio_from_text
+
+        # Text i is i+1 sentences long, so its audio should be the i-th longest
+        texts = [" ".join(BENCHMARK_TEXTS[:count + 1]) for count in range(options['threads'])]
+        url = options['voice_sample_url']
+
+        with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+            results = list(executor.map(lambda text: generate_audio_from_text(text, url), texts))
+
+        durations = []
+        for text, result in zip(texts, results):
+            if result['error']:
+                raise CommandError(result['error'])
+            durations.append(_duration(result['audio']))
+            self.stdout.write(f"{len(text):5d} chars -> {durations[-1]:.1f}s audio")
+
+        if durations != sorted(durations) or len(set(durations)) != len(durations):
+            raise CommandError("Audio durations don't follow text lengths - outputs were mixed up")
+        self.stdout.write("OK: every thread got audio matching its own text")
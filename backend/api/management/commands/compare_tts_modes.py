@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from .benchmark_tts import BENCHMARK_TEXTS
+import os
+import requests
+import time
+
+
+class Command(BaseCommand):
+    help = "Compare TTS inference modes (fp32 vs int8) on speed and voice similarity"
+
+    def add_arguments(self, parser):
+        parser.add_argument('voice_sample_urls', nargs='+', help="Voice samples to clone")
+        parser.add_argument('--texts', type=int, default=len(BENCHMARK_TEXTS), help="Number of fixed texts per voice")
+        parser.add_argument('--output-dir', help="Write every generated WAV here for listening tests")
+
+    def handle(self, *args, **options):
+        # Start from full precision; quantization is applied in place later
+        settings.TTS_INFERENCE_MODE = 'fp32'
+        from backend.api.services import voice_service
+        import torch
+
+        texts = BENCHMARK_TEXTS[:options['texts']]
+        urls = options['voice_sample_urls']
+
+        # Reference speaker embeddings from the original samples. The speaker
+        # encoder is not quantized, so this yardstick is the same for all modes.
+        references = []
+        for url in urls:
+            response = requests.get(url)
+            response.raise_for_status()
+            references.append(voice_service._conditioning_latents(response.content)[1])
+
+        voice_service.generate_audio_batch(texts[:1], urls[0])  # warm-up
+
+        for mode in voice_service.INFERENCE_MODES:
+            voice_service.set_inference_mode(mode)
+
+            for voice_index, url in enumerate(urls):
+                start = time.perf_counter()
+                result = voice_service.generate_audio_batch(texts, url)
+                wall_seconds = time.perf_counter() - start
+                if result['error']:
+                    raise Exception(result['error'])
+
+                audio_seconds = 0.0
+                similarities = []
+                for text_index, item in enumerate(result['results']):
+                    if item['error']:
+                        self.stderr.write(f"{mode} voice {voice_index} text {text_index}: {item['error']}")
+                        continue
+                    audio_seconds += item['duration']
+
+                    embedding = voice_service._conditioning_latents(item['audio'])[1]
+                    similarities.append(torch.nn.functional.cosine_similarity(
+                        embedding.flatten(), references[voice_index].flatten(), dim=0
+                    ).item())
+
+                    if options['output_dir']:
+                        directory = os.path.join(options['output_dir'], mode)
+                        os.makedirs(directory, exist_ok=True)
+                        with open(os.path.join(directory, f"voice{voice_index}_text{text_index}.wav"), "wb") as f:
+                            f.write(item['audio'])
+
+                similarity = sum(similarities) / len(similarities) if similarities else 0.0
+                self.stdout.write(
+                    f"{mode:>5} voice {voice_index}: {audio_seconds:.1f}s audio in {wall_seconds:.1f}s "
+                    f"({audio_seconds / wall_seconds:.2f}x real time), speaker similarity {similarity:.3f}"
+                )
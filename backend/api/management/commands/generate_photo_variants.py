@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from backend.api.services.supabase_client import supabase
+from backend.api.services.image_variant_service import (
+    upload_variants, storage_path, add_profile_photo_variants
+)
+import requests
+
+
+class Command(BaseCommand):
+    help = "Create thumbnail/screen variants for photos uploaded before variants existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help="Most photos to process per table")
+
+    def handle(self, *args, **options):
+        photos = supabase.table('memory_photos').select('id, photo_url').is_('thumb_url', 'null').limit(options['limit']).execute().data or []
+        done = 0
+        for photo in photos:
+            try:
+                response = requests.get(photo['photo_url'], timeout=10)
+                response.raise_for_status()
+                path = storage_path(photo['photo_url'], 'profiles') or f"memory-photos/{photo['id']}"
+                urls = upload_variants('profiles', path, response.content)
+                if not any(urls.values()):
+                    raise ValueError("could not decode image")
+                supabase.table('memory_photos').update(urls).eq('id', photo['id']).execute()
+                done += 1
+            except Exception as e:
+                self.stderr.write(f"Photo {photo['id']}: {e}")
+        self.stdout.write(f"Memory photos: {done}/{len(photos)} updated")
+
+        members = (
+            supabase.table('family_members').select('id, profile_photo_url')
+            .not_.is_('profile_photo_url', 'null').is_('profile_photo_thumb_url', 'null')
+            .limit(options['limit']).execute().data or []
+        )
+        done = 0
+        for member in members:
+            result = add_profile_photo_variants(member['id'], member['profile_photo_url'])
+            if result['error']:
+                self.stderr.write(f"Member {member['id']}: {result['error']}")
+            else:
+                done += 1
+        self.stdout.write(f"Profile photos: {done}/{len(members)} updated")
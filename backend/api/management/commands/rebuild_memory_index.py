@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from backend.api.services.supabase_client import supabase
+from backend.api.services.memory_index_service import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the semantic memory search index for one or all patients"
+
+    def add_arguments(self, parser):
+        parser.add_argument('patient_ids', nargs='*', help="Patient IDs (default: every patient with family members)")
+
+    def handle(self, *args, **options):
+        patient_ids = options['patient_ids']
+        if not patient_ids:
+            result = supabase.table('family_members').select('patient_id').execute()
+            patient_ids = sorted({row['patient_id'] for row in result.data or []})
+
+        for patient_id in patient_ids:
+            result = rebuild_index(patient_id)
+            if result['error']:
+                self.stderr.write(f"{patient_id}: {result['error']}")
+            else:
+                self.stdout.write(f"{patient_id}: {result['count']} memories indexed")
@@ -0,0 +1,74 @@
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand
+import glob
+import json
+import os
+
+
+def _read_stacks(path):
+    stacks = Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+class Command(BaseCommand):
+    help = "List the slowest captured request profiles and their hottest functions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', help="Only profiles for this endpoint (view name)")
+        parser.add_argument('--limit', type=int, default=10, help="Number of profiles to list")
+        parser.add_argument('--top', type=int, default=8, help="Functions to show per profile")
+
+    def handle(self, *args, **options):
+        profiles = []
+        for path in glob.glob(os.path.join(settings.PROFILER_OUTPUT_DIR, '*', '*.json')):
+            with open(path, encoding='utf-8') as f:
+                metadata = json.load(f)
+            if options['endpoint'] and metadata['endpoint'] != options['endpoint']:
+                continue
+            metadata['folded'] = path[:-len('.json')] + '.folded'
+            profiles.append(metadata)
+
+        if not profiles:
+            self.stdout.write("No profiles captured.")
+            return
+
+        # Per-endpoint overview
+        by_endpoint = {}
+        for profile in profiles:
+            by_endpoint.setdefault(profile['endpoint'], []).append(profile['duration_ms'])
+        self.stdout.write("Endpoint summary (count, median ms, max ms):")
+        for endpoint, durations in sorted(by_endpoint.items(), key=lambda item: -max(item[1])):
+            durations.sort()
+            self.stdout.write(f"  {endpoint}: {len(durations)}, {durations[len(durations) // 2]:.0f}, {durations[-1]:.0f}")
+
+        profiles.sort(key=lambda p: -p['duration_ms'])
+        for profile in profiles[:options['limit']]:
+            self.stdout.write(
+                f"\n{profile['duration_ms']:.0f}ms {profile['method']} {profile['path']} "
+                f"({profile['reason']}, trace {profile['trace_id']})\n  {profile['folded']}"
+            )
+
+            stacks = _read_stacks(profile['folded'])
+            total = sum(stacks.values()) or 1
+
+            # Self time: the leaf frame; cumulative time: anywhere on the stack
+            self_time = Counter()
+            cumulative = Counter()
+            for stack, count in stacks.items():
+                frames = stack.split(';')
+                self_time[frames[-1]] += count
+                for frame in set(frames):
+                    cumulative[frame] += count
+
+            self.stdout.write("  self:")
+            for frame, count in self_time.most_common(options['top']):
+                self.stdout.write(f"    {100 * count / total:5.1f}%  {frame}")
+            self.stdout.write("  cumulative:")
+            for frame, count in cumulative.most_common(options['top']):
+                self.stdout.write(f"    {100 * count / total:5.1f}%  {frame}")
@@ -0,0 +1,151 @@
+# backend/api/profiling.py
+
+from collections import Counter
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .tracing import current_trace_id
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+def _folded_stack(frame):
+    """Root-first 'a;b;c' stack, the collapsed format flamegraph tools read"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    One background thread that periodically samples the stacks of the
+    threads currently registered (one per in-flight profiled request).
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}  # thread id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_folded_stack(frame)] += 1
+
+    def start(self, thread_id):
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+
+def prune_profiles(directory, keep):
+    """Delete all but the newest `keep` profiles in an endpoint directory"""
+    # Names start with a UTC timestamp, so they sort oldest first
+    profiles = sorted(name for name in os.listdir(directory) if name.endswith('.folded'))
+    for name in profiles[:max(len(profiles) - keep, 0)]:
+        base = os.path.join(directory, name[:-len('.folded')])
+        for path in (f"{base}.folded", f"{base}.json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker pruned it first
+
+
+def save_profile(stacks, metadata):
+    """
+    Write <endpoint>/<name>.folded (flamegraph input) plus a .json sidecar,
+    keeping at most PROFILER_MAX_PROFILES per endpoint
+    """
+    endpoint = re.sub(r'[^A-Za-z0-9_.-]+', '_', metadata['endpoint']).strip('_') or 'unknown'
+    directory = os.path.join(settings.PROFILER_OUTPUT_DIR, endpoint)
+    os.makedirs(directory, exist_ok=True)
+
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    base = os.path.join(directory, f"{stamp}_{int(metadata['duration_ms'])}ms")
+
+    with open(f"{base}.folded", 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(f"{base}.json", 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+
+    prune_profiles(directory, settings.PROFILER_MAX_PROFILES)
+    return f"{base}.folded"
+
+
+class SamplingProfilerMiddleware:
+    """
+    Profile a random PROFILER_SAMPLE_RATE fraction of requests, and keep the
+    profile of any request slower than PROFILER_SLOW_THRESHOLD_MS.
+
+    With a slow threshold set every request is sampled (cheaply - one shared
+    sampler thread), and fast, unselected profiles are thrown away.
+    Disabled entirely unless PROFILER_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sampler = StackSampler(settings.PROFILER_INTERVAL_MS / 1000)
+
+    def __call__(self, request):
+        selected = random.random() < settings.PROFILER_SAMPLE_RATE
+        threshold = settings.PROFILER_SLOW_THRESHOLD_MS
+        if not selected and not threshold:
+            return self.get_response(request)
+
+        thread_id = threading.get_ident()
+        start = time.perf_counter()
+        self.sampler.start(thread_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = self.sampler.stop(thread_id)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if stacks and (selected or (threshold and duration_ms >= threshold)):
+            match = getattr(request, 'resolver_match', None)
+            try:
+                save_profile(stacks, {
+                    'endpoint': match.view_name if match else request.path,
+                    'method': request.method,
+                    'path': request.path,
+                    'status_code': response.status_code,
+                    'duration_ms': round(duration_ms, 2),
+                    'samples': sum(stacks.values()),
+                    'interval_ms': settings.PROFILER_INTERVAL_MS,
+                    'trace_id': current_trace_id(),
+                    'reason': 'sampled' if selected else 'slow',
+                    'captured_at': datetime.now(timezone.utc).isoformat(),
+                })
+            except OSError as e:
+                print(f"Profile save error: {e}")
+
+        return response
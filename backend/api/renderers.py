@@ -0,0 +1,35 @@
+# backend/api/renderers.py
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # optional - falls back to DRF's renderer
+    orjson = None
+
+
+def _default(obj):
+    """Types orjson doesn't handle natively (Decimal, lazy translation strings, ...)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, 'tolist'):  # numpy scalars/arrays
+        return obj.tolist()
+    return str(obj)
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson (several times faster than the stdlib
+    encoder DRF's JSONRenderer uses). Output is compact UTF-8.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None:
+            return JSONRenderer().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
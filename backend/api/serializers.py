@@ -24,6 +24,7 @@ class MemoryCreateSerializer(serializers.Serializer):
 class PatientQuerySerializer(serializers.Serializer):
     patient_id = serializers.UUIDField()
     query = serializers.CharField()
+    speak = serializers.BooleanField(required=False, default=False)  # answer audio in the member's voice
 
 class VideoUploadSerializer(serializers.Serializer):
     family_member_id = serializers.UUIDField()
@@ -33,4 +34,17 @@ class VideoUploadSerializer(serializers.Serializer):
     thumbnail = serializers.ImageField(required=False)
 
 class VideoListSerializer(serializers.Serializer):
-    patient_id = serializers.UUIDField()
\ No newline at end of file
+    patient_id = serializers.UUIDField()
+
+class MemoryImportItemSerializer(serializers.Serializer):
+    family_member_id = serializers.UUIDField()
+    title = serializers.CharField(max_length=255)
+    content = serializers.CharField()
+    photos = serializers.ListField(
+        child=serializers.CharField(),  # archive paths or upload field names
+        required=False,
+        max_length=5
+    )
+
+class MemoryImportSerializer(serializers.Serializer):
+    memories = MemoryImportItemSerializer(many=True, allow_empty=False)
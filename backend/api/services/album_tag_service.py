@@ -0,0 +1,134 @@
+# backend/api/services/album_tag_service.py
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from .supabase_client import supabase
+from .image_recognition_service import identify_people_in_photo, load_reference_photos
+from .image_variant_service import upload_with_variants
+from .photo_cache_service import (
+    compute_image_hash, roster_fingerprint, get_cached_identification, cache_identification
+)
+from ..admission import get_limiter
+from ..tracing import propagate, span
+import os
+import time
+import uuid
+
+VISION_ATTEMPTS = 3
+
+
+def _identify(patient_id, image_bytes, members, references, fingerprint, version):
+    """Group identification of one photo - phash cache first, then a vision slot"""
+    image_hash = compute_image_hash(image_bytes)
+    result = get_cached_identification(patient_id, image_hash, fingerprint, version, mode='group')
+    if result is not None:
+        return result
+
+    # Album photos share the per-process vision limit with interactive requests
+    limiter = get_limiter('gemini_vision')
+    for attempt in range(VISION_ATTEMPTS):
+        if limiter.acquire():
+            break
+        time.sleep(1 + attempt)
+    else:
+        return {"faces": [], "error": "Photo recognition is busy, please retry this photo"}
+
+    try:
+        result = identify_people_in_photo(image_bytes, members, references=references)
+    finally:
+        limiter.release()
+    cache_identification(patient_id, image_hash, fingerprint, version, result, mode='group')
+    return result
+
+
+def _tag_photo(patient_id, upload, members, references, fingerprint, version):
+    """Identify, store and tag one album photo -> per-photo result dict"""
+    name = upload.name
+    with span('album.tag_photo', photo=name):
+        image_bytes = upload.read()
+        result = _identify(patient_id, image_bytes, members, references, fingerprint, version)
+        if result['error']:
+            return {"photo": name, "faces": [], "error": result['error']}
+
+        path = f"album-photos/{patient_id}/{uuid.uuid4()}_{os.path.basename(name)}"
+        stored = upload_with_variants('profiles', path, image_bytes)
+        if stored['error']:
+            return {"photo": name, "faces": result['faces'], "error": f"Upload failed: {stored['error']}"}
+
+        album_photo = supabase.table('album_photos').insert({
+            'patient_id': patient_id,
+            'photo_url': stored['url'],
+            'thumb_url': stored['thumb_url'],
+            'screen_url': stored['screen_url'],
+        }).execute().data[0]
+
+        # Unrecognised faces are kept too (no member) so they can be labelled later
+        if result['faces']:
+            supabase.table('photo_tags').insert([
+                {
+                    'album_photo_id': album_photo['id'],
+                    'family_member_id': face['family_member_id'],
+                    'box': face['box'],
+                    'confidence': face['confidence'],
+                }
+                for face in result['faces']
+            ]).execute()
+
+        return {
+            "photo": name,
+            "album_photo_id": album_photo['id'],
+            "photo_url": stored['url'],
+            "thumb_url": stored['thumb_url'],
+            "faces": result['faces'],
+            "error": None
+        }
+
+
+def tag_album(patient_id, uploads, members, version):
+    """
+    Tag every photo of an album with the family members in it
+
+    The roster's reference photos are downloaded once for the whole album;
+    photos are identified on a bounded pool (ALBUM_TAG_WORKERS).
+
+    Args:
+        patient_id: Patient UUID
+        uploads: Uploaded image files
+        members: The patient's family member rows
+        version: roster_version() read before members was fetched
+
+    Returns:
+        Generator of per-photo result dicts, in completion order, followed by
+        a summary {"done": True, "tagged": n, "failed": n}
+    """
+    references = load_reference_photos(members)
+    fingerprint = roster_fingerprint(members)
+    # Bound to the request's trace now - the generator runs after the view returns
+    tag = [propagate(_tag_photo) for _ in uploads]
+
+    def results():
+        if not references:
+            yield {"done": True, "tagged": 0, "failed": len(uploads), "error": "No family member photos available for comparison"}
+            return
+
+        tagged = failed = 0
+        with ThreadPoolExecutor(max_workers=settings.ALBUM_TAG_WORKERS, thread_name_prefix='album-tag') as executor:
+            futures = [
+                executor.submit(fn, patient_id, upload, members, references, fingerprint, version)
+                for fn, upload in zip(tag, uploads)
+            ]
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Album tagging error: {e}")
+                    result = {"photo": None, "faces": [], "error": str(e)}
+                if result['error']:
+                    failed += 1
+                else:
+                    tagged += 1
+                yield result
+
+        yield {"done": True, "tagged": tagged, "failed": failed, "error": None}
+
+    return results()
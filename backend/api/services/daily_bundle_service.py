@@ -0,0 +1,164 @@
+# backend/api/services/daily_bundle_service.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from django.conf import settings
+from .supabase_client import supabase
+from .gemini_service import generate_daily_greeting
+from ..fields import public_member, PATIENT_MEMBER_FIELDS, PATIENT_MEMORY_SELECT
+from ..tracing import propagate, span
+
+
+def _rotation_order(memories):
+    """
+    Interleave members' memories (oldest first per member), so consecutive
+    picks come from different people and every memory comes round in turn
+    """
+    by_member = {}
+    for memory in sorted(memories, key=lambda m: (m['created_at'], m['id'])):
+        by_member.setdefault(memory['family_member_id'], []).append(memory['id'])
+
+    queues = [by_member[member_id] for member_id in sorted(by_member)]
+    order = []
+    for i in range(max((len(queue) for queue in queues), default=0)):
+        order.extend(queue[i] for queue in queues if i < len(queue))
+    return order
+
+
+def select_daily_memories(memories, day, count):
+    """
+    Today's memory ids: a window of `count` that moves along the rotation by
+    `count` each day, so the patient sees every memory before any repeats
+    """
+    order = _rotation_order(memories)
+    if not order:
+        return []
+    start = (day.toordinal() * count) % len(order)
+    window = (order[start:] + order[:start])[:count]
+    return window
+
+
+def roster_answers(members, memories):
+    """
+    Answers to the questions patients ask every day, resolved without Gemini.
+    Questions are lower-case, without punctuation, for matching on the device.
+    """
+    memory_ids_by_member = {}
+    for memory in memories:
+        memory_ids_by_member.setdefault(memory['family_member_id'], []).append(memory['id'])
+
+    answers = []
+    by_relationship = {}
+    for member in members:
+        relationship = (member.get('relationship') or '').lower()
+        by_relationship.setdefault(relationship, []).append(member)
+        answers.append({
+            'type': 'family_member',
+            'questions': [f"who is my {relationship}", f"who is {member['name'].lower()}"],
+            'family_member_id': member['id'],
+            'answer': f"That's {member['name']}, your {relationship}. {member['name']} loves you very much!",
+            'memory_ids': memory_ids_by_member.get(member['id'], []),
+        })
+
+    for relationship, related in by_relationship.items():
+        names = " and ".join(member['name'] for member in related)
+        answers.append({
+            'type': 'count',
+            'questions': [f"how many {relationship}s do i have", f"do i have a {relationship}"],
+            'count': len(related),
+            'family_members': [member['id'] for member in related],
+            'answer': f"You have {len(related)} {relationship}{'s' if len(related) != 1 else ''}: {names}.",
+        })
+
+    if members:
+        family = ", ".join(f"your {(member.get('relationship') or '').lower()} {member['name']}" for member in members)
+        answers.append({
+            'type': 'list_all',
+            'questions': ["who is in my family", "tell me about my family", "who are my family members"],
+            'family_members': [member['id'] for member in members],
+            'answer': f"You have a wonderful family: {family}. They all love you very much!",
+        })
+    return answers
+
+
+def _default_greeting(patient_name, day):
+    name = f", {patient_name}" if patient_name else ""
+    return f"Good morning{name}! Today is {day.strftime('%A, %B %d')}. Let's look at some happy memories together."
+
+
+def build_daily_bundle(patient_id, day, use_gemini=True):
+    """
+    Precompute the patient's "today" document: greeting, rotating memories
+    (with audio and photos) and roster answers, and store it in daily_bundles
+
+    Args:
+        patient_id: Patient UUID
+        day: datetime.date the bundle is for
+        use_gemini: Write the greeting with Gemini (nightly job) or use the
+            template greeting (on-demand builds, no model latency)
+
+    Returns:
+        {"bundle": {...}, "created_at": "...", "error": None}
+    """
+    try:
+        with span('bundle.build', patient_id=patient_id, day=day.isoformat()):
+            def fetch_patient():
+                return supabase.table('patients').select('name').eq('id', patient_id).execute()
+
+            def fetch_members():
+                return supabase.table('family_members').select(', '.join(PATIENT_MEMBER_FIELDS)).eq('patient_id', patient_id).order('created_at').execute()
+
+            def fetch_candidates():
+                # Only ids and dates for the rotation; full rows are loaded for the picks
+                return (
+                    supabase.table('memories').select('id, family_member_id, created_at, family_members!inner (patient_id)')
+                    .eq('family_members.patient_id', patient_id).not_.is_('audio_url', 'null').execute()
+                )
+
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                patient_future = executor.submit(propagate(fetch_patient))
+                members_future = executor.submit(propagate(fetch_members))
+                candidates_future = executor.submit(propagate(fetch_candidates))
+
+                patient = (patient_future.result().data or [{}])[0]
+                members = members_future.result().data or []
+                candidates = candidates_future.result().data or []
+
+            memory_ids = select_daily_memories(candidates, day, settings.DAILY_BUNDLE_MEMORIES)
+            memories = []
+            if memory_ids:
+                rows = supabase.table('memories').select(PATIENT_MEMORY_SELECT).in_('id', memory_ids).execute().data or []
+                by_id = {row['id']: row for row in rows}
+                memories = [by_id[memory_id] for memory_id in memory_ids if memory_id in by_id]
+
+            greeting = None
+            if use_gemini:
+                greeting = generate_daily_greeting(patient.get('name'), day, members, memories)['greeting']
+
+            bundle = {
+                'patient_id': patient_id,
+                'date': day.isoformat(),
+                'generated_at': datetime.now(timezone.utc).isoformat(),
+                'greeting': greeting or _default_greeting(patient.get('name'), day),
+                'family_members': [public_member(member) for member in members],
+                'memories': memories,
+                'roster_answers': roster_answers(members, memories),
+            }
+
+            row = supabase.table('daily_bundles').upsert({
+                'patient_id': patient_id,
+                'bundle_date': day.isoformat(),
+                'bundle': bundle,
+                'created_at': bundle['generated_at'],
+            }, on_conflict='patient_id,bundle_date').execute().data[0]
+
+        return {"bundle": bundle, "created_at": row['created_at'], "error": None}
+    except Exception as e:
+        print(f"Daily bundle error for {patient_id}: {e}")
+        return {"bundle": None, "created_at": None, "error": str(e)}
+
+
+def get_daily_bundle(patient_id, day):
+    """Stored bundle row ({"bundle", "created_at"}) for the day, or None"""
+    result = supabase.table('daily_bundles').select('bundle, created_at').eq('patient_id', patient_id).eq('bundle_date', day.isoformat()).execute()
+    return result.data[0] if result.data else None
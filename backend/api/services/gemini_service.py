@@ -1,69 +1,83 @@
-import google.generativeai as genai
 import os
 import json
 import re
+import threading
+import time
 from dotenv import load_dotenv
+from ..tracing import span
 
 load_dotenv()
 
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.5-flash')
+# The Gemini SDK is imported and configured on first use, so importing this
+# module (every manage.py command, every web worker) stays cheap
+_configured = False
+_configure_lock = threading.Lock()
+_model = None
 
-def query_patient_memory(query: str, family_members: list, patient_info: dict = None):
-    """
-    Query Gemini to handle VERSATILE patient questions
+
+def get_genai():
+    """google.generativeai, configured with GEMINI_API_KEY"""
+    global _configured
+    import google.generativeai as genai
     
-    Handles:
-    - "Who is my daughter?" → specific family member
-    - "How many sons do I have?" → count query
-    - "Tell me about my family" → list all members
-    - "What did I do with Sarah?" → memories with specific person
-    - "Where is my home?" → patient info
-    - General conversation
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+                _configured = True
+    return genai
+
+
+def get_model():
+    """Shared text model for patient queries"""
+    global _model
+    if _model is None:
+        _model = get_genai().GenerativeModel('gemini-2.5-flash')
+    return _model
+
+
+MEMORY_EXCERPT_CHARS = 300
+
+def _query_prompt(query: str, family_members: list, patient_info: dict = None, memories: list = None):
+    """Prompt for a patient question, without the output-format line"""
+    # Build context
+    context_parts = []
     
-    Args:
-        query: Patient's question
-        family_members: List of family member dicts with id, name, relationship
-        patient_info: Optional dict with patient's personal info
+    # Add family members context
+    if family_members:
+        context_parts.append("FAMILY MEMBERS:")
+        for member in family_members:
+            context_parts.append(
+                f"- ID: {member['id']}, Name: {member['name']}, "
+                f"Relationship: {member['relationship']}"
+            )
     
-    Returns:
-        {
-            "type": "family_member" | "count" | "list_all" | "patient_info" | "conversation",
-            "family_member_id": "uuid" (if specific member),
-            "family_members": [...] (if list/count),
-            "count": number (if count query),
-            "answer": "Natural language response",
-            "show_memories": true/false,
-            "error": None
-        }
-    """
-    try:
-        # Build context
-        context_parts = []
-        
-        # Add family members context
-        if family_members:
-            context_parts.append("FAMILY MEMBERS:")
-            for member in family_members:
-                context_parts.append(
-                    f"- ID: {member['id']}, Name: {member['name']}, "
-                    f"Relationship: {member['relationship']}"
-                )
-        
-        # Add patient info context
-        if patient_info:
-            context_parts.append("\nPATIENT INFORMATION:")
-            if patient_info.get('home_address'):
-                context_parts.append(f"- Home: {patient_info['home_address']}")
-            if patient_info.get('doctor_name'):
-                context_parts.append(f"- Doctor: {patient_info['doctor_name']}")
-            if patient_info.get('emergency_contacts'):
-                context_parts.append(f"- Emergency Contacts: {len(patient_info['emergency_contacts'])} contacts")
-        
-        context = "\n".join(context_parts)
-        
-        # Create versatile prompt
-        prompt = f"""You are a compassionate AI assistant helping an Alzheimer's patient remember their family and life.
+    # Add patient info context
+    if patient_info:
+        context_parts.append("\nPATIENT INFORMATION:")
+        if patient_info.get('home_address'):
+            context_parts.append(f"- Home: {patient_info['home_address']}")
+        if patient_info.get('doctor_name'):
+            context_parts.append(f"- Doctor: {patient_info['doctor_name']}")
+        if patient_info.get('emergency_contacts'):
+            context_parts.append(f"- Emergency Contacts: {len(patient_info['emergency_contacts'])} contacts")
+    
+    # Add the memories retrieved for this question
+    if memories:
+        names = {member['id']: member['name'] for member in family_members}
+        context_parts.append("\nRELEVANT MEMORIES:")
+        for memory in memories:
+            excerpt = memory.get('content', '')[:MEMORY_EXCERPT_CHARS]
+            context_parts.append(
+                f"- With: {names.get(memory['family_member_id'], 'family')} "
+                f"(ID: {memory['family_member_id']}), "
+                f"Title: {memory['title']}, Memory: {excerpt}"
+            )
+    
+    context = "\n".join(context_parts)
+    
+    # Create versatile prompt
+    prompt = f"""You are a compassionate AI assistant helping an Alzheimer's patient remember their family and life.
 
 CONTEXT:
 {context}
@@ -127,11 +141,46 @@ IMPORTANT:
 - Use the person's name when possible
 - Add encouraging phrases
 - Set show_memories=true ONLY when asking about a specific person's activities/memories
+- When RELEVANT MEMORIES answer the question, mention what happened in the answer"""
+    return prompt
 
-Return ONLY valid JSON, no extra text."""
 
+def query_patient_memory(query: str, family_members: list, patient_info: dict = None, memories: list = None):
+    """
+    Query Gemini to handle VERSATILE patient questions
+    
+    Handles:
+    - "Who is my daughter?" → specific family member
+    - "How many sons do I have?" → count query
+    - "Tell me about my family" → list all members
+    - "What did I do with Sarah?" → memories with specific person
+    - "Where is my home?" → patient info
+    - General conversation
+    
+    Args:
+        query: Patient's question
+        family_members: List of family member dicts with id, name, relationship
+        patient_info: Optional dict with patient's personal info
+        memories: Optional list of memory dicts relevant to the query
+    
+    Returns:
+        {
+            "type": "family_member" | "count" | "list_all" | "patient_info" | "conversation",
+            "family_member_id": "uuid" (if specific member),
+            "family_members": [...] (if list/count),
+            "count": number (if count query),
+            "answer": "Natural language response",
+            "show_memories": true/false,
+            "error": None
+        }
+    """
+    try:
+        model = get_model()
+        prompt = _query_prompt(query, family_members, patient_info, memories) + "\n\nReturn ONLY valid JSON, no extra text."
+        
         # Call Gemini
-        response = model.generate_content(prompt)
+        with span('gemini.generate_content', model=model.model_name, purpose='patient_query'):
+            response = model.generate_content(prompt)
         response_text = response.text.strip()
         
         # Clean response (remove markdown code blocks if present)
@@ -164,4 +213,134 @@ Return ONLY valid JSON, no extra text."""
             "answer": "Sorry, I'm having trouble right now. Please try again.",
             "show_memories": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+STREAM_FORMAT = """OUTPUT FORMAT (the answer is shown to the patient while you write it):
+Line 1: the JSON for the matching response type above, on ONE line, WITHOUT the "answer" field
+Line 2: ---
+Then: the answer itself as plain text (no JSON, no quotes)
+
+Example:
+{"type": "family_member", "family_member_id": "exact ID from context", "show_memories": true}
+---
+Your daughter Sarah. She loves spending time with you!"""
+
+_STREAM_SEPARATOR = re.compile(r'\n\s*---\s*\n')
+
+
+def _parse_reply_json(text):
+    text = re.sub(r'```json\s*|\s*```', '', text).strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not match:
+            raise
+        return json.loads(match.group())
+
+
+def _chunk_text(chunk):
+    """Text of a streamed chunk, '' for chunks without parts (finish-only, safety) where .text raises"""
+    if not chunk.candidates or not chunk.candidates[0].content.parts:
+        return ''
+    return chunk.text
+
+
+def stream_patient_memory(query: str, family_members: list, patient_info: dict = None, memories: list = None):
+    """
+    Streaming version of query_patient_memory. The model writes the response
+    type and targets as a header line before the answer, so they are known
+    before the answer text starts.
+    
+    Yields:
+        ("meta", {type, family_member_id, family_members, count, show_memories, ...}) once,
+        then ("text", chunk) for each piece of the answer.
+        On failure: ("error", {"type": "error", "answer": ..., "error": ...})
+    """
+    try:
+        model = get_model()
+        prompt = _query_prompt(query, family_members, patient_info, memories) + "\n\n" + STREAM_FORMAT
+        
+        with span('gemini.generate_content', model=model.model_name, purpose='patient_query_stream', stream=True) as record:
+            start = time.perf_counter()
+            buffer = ''
+            meta = None
+            for chunk in model.generate_content(prompt, stream=True):
+                text = _chunk_text(chunk)
+                if not text:
+                    continue
+                if meta is not None:
+                    yield ("text", text)
+                    continue
+                
+                buffer += text
+                separator = _STREAM_SEPARATOR.search(buffer)
+                if not separator:
+                    continue
+                meta = _parse_reply_json(buffer[:separator.start()])
+                meta.pop('answer', None)
+                record['first_token_ms'] = round((time.perf_counter() - start) * 1000, 2)
+                yield ("meta", meta)
+                
+                rest = buffer[separator.end():]
+                if rest:
+                    yield ("text", rest)
+        
+        if meta is None:
+            # The model ignored the format - fall back to the one-shot JSON reply
+            result = _parse_reply_json(buffer)
+            answer = result.pop('answer', '')
+            yield ("meta", result)
+            yield ("text", answer)
+        
+    except Exception as e:
+        print(f"Gemini stream error: {e}")
+        yield ("error", {
+            "type": "error",
+            "answer": "Sorry, I'm having trouble right now. Please try again.",
+            "show_memories": False,
+            "error": str(e)
+        })
+
+
+def generate_daily_greeting(patient_name: str, day, family_members: list, memories: list):
+    """
+    Short, warm good-morning message for the patient's daily bundle
+    
+    Args:
+        patient_name: Patient's name (may be None)
+        day: datetime.date the greeting is for
+        family_members: List of member dicts with name, relationship
+        memories: Today's selected memories (title, family_member_id)
+    
+    Returns:
+        {"greeting": "...", "error": None}
+    """
+    try:
+        model = get_model()
+        
+        names = {member['id']: member['name'] for member in family_members}
+        family = ", ".join(f"{member['name']} ({member['relationship']})" for member in family_members)
+        memory_lines = "\n".join(
+            f"- {memory['title']} (with {names.get(memory['family_member_id'], 'family')})"
+            for memory in memories
+        )
+        
+        prompt = f"""You are a compassionate AI assistant helping an Alzheimer's patient start their day.
+
+Write a short good-morning greeting (2-3 sentences) for {patient_name or 'the patient'}.
+Today is {day.strftime('%A, %B %d, %Y')}.
+Family: {family or 'not registered yet'}
+Today's memories to look at:
+{memory_lines or '- none yet'}
+
+Mention the day and date, and gently invite them to look at one of today's memories.
+Be warm and simple. Return ONLY the greeting text."""
+
+        with span('gemini.generate_content', model=model.model_name, purpose='daily_greeting'):
+            response = model.generate_content(prompt)
+        return {"greeting": response.text.strip(), "error": None}
+        
+    except Exception as e:
+        print(f"Gemini greeting error: {e}")
+        return {"greeting": None, "error": str(e)}
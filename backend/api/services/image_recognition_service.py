@@ -1,11 +1,12 @@
 # backend/api/services/image_recognition_service.py
 
-import google.generativeai as genai
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
 import io
 import requests
 import json
 import re
+from .gemini_service import get_genai
+from ..tracing import propagate, span
 
 def identify_person_from_photo(uploaded_image_bytes, family_members):
     """
@@ -26,8 +27,10 @@ def identify_person_from_photo(uploaded_image_bytes, family_members):
         }
     """
     try:
+        from PIL import Image
+        
         # Initialize Gemini Vision model
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model = get_genai().GenerativeModel('gemini-2.5-flash')
         
         # Load uploaded image
         uploaded_image = Image.open(io.BytesIO(uploaded_image_bytes))
@@ -55,7 +58,8 @@ def identify_person_from_photo(uploaded_image_bytes, family_members):
             
             # Download reference photo
             try:
-                response = requests.get(member['profile_photo_url'], timeout=10)
+                with span('http.download', purpose='reference_photo'):
+                    response = requests.get(member['profile_photo_url'], timeout=10)
                 if response.status_code == 200:
                     ref_image = Image.open(io.BytesIO(response.content))
                     content.append(ref_image)
@@ -102,7 +106,8 @@ Return ONLY the JSON, no extra text."""
         content.append(prompt)
         
         # Call Gemini Vision
-        response = model.generate_content(content)
+        with span('gemini.generate_content', model=model.model_name, purpose='identify_photo', images=len(content) - 1):
+            response = model.generate_content(content)
         response_text = response.text.strip()
         
         # Clean response
@@ -185,4 +190,178 @@ Return ONLY the JSON, no extra text."""
             "confidence": "none",
             "reasoning": str(e),
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+REFERENCE_FORMATS = ('JPEG', 'PNG', 'WEBP')  # sent to Gemini as-is
+
+
+def load_reference_photos(family_members):
+    """
+    Download each member's profile photo for comparison (concurrently)
+
+    Returns:
+        [(reference number, member, image blob), ...] numbered from 1, members
+        without a (downloadable, decodable) photo skipped. Blobs are
+        {"mime_type", "data"} dicts - plain bytes, safe to share between the
+        threads of an album run (a lazily decoded PIL image is not: every
+        generate_content re-reads its file handle)
+    """
+    from PIL import Image
+    
+    def download(member):
+        try:
+            with span('http.download', purpose='reference_photo'):
+                response = requests.get(member['profile_photo_url'], timeout=10)
+            if response.status_code == 200:
+                # Decode once here so a broken file is skipped, not sent
+                with Image.open(io.BytesIO(response.content)) as image:
+                    image.load()
+                    if image.format in REFERENCE_FORMATS:
+                        return {"mime_type": Image.MIME[image.format], "data": response.content}
+                    # e.g. GIF/BMP - re-encode once as PNG
+                    buffer = io.BytesIO()
+                    image.convert('RGB').save(buffer, format='PNG')
+                    return {"mime_type": "image/png", "data": buffer.getvalue()}
+        except Exception as e:
+            print(f"Failed to download photo for {member['name']}: {e}")
+        return None
+    
+    with_photo = [member for member in family_members if member.get('profile_photo_url')]
+    if not with_photo:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(with_photo), 8)) as executor:
+        futures = [executor.submit(propagate(download), member) for member in with_photo]
+        images = [future.result() for future in futures]
+    
+    references = []
+    for member, image in zip(with_photo, images):
+        if image is not None:
+            references.append((len(references) + 1, member, image))
+    return references
+
+
+def _parse_json(text):
+    """JSON object from a model reply (tolerates code fences and extra text)"""
+    text = re.sub(r'```json\s*|\s*```', '', text).strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not match:
+            raise
+        return json.loads(match.group())
+
+
+def _box(box_2d):
+    """Gemini box_2d [ymin, xmin, ymax, xmax] (0-1000) -> fractions of the image"""
+    try:
+        ymin, xmin, ymax, xmax = (min(max(float(v), 0), 1000) / 1000 for v in box_2d)
+    except (TypeError, ValueError):
+        return None
+    return {"x": xmin, "y": ymin, "width": max(xmax - xmin, 0), "height": max(ymax - ymin, 0)}
+
+
+def identify_people_in_photo(uploaded_image_bytes, family_members, references=None):
+    """
+    Find every face in a (group) photo and match all of them against the
+    family members' reference photos in a single Gemini Vision call
+    
+    Args:
+        uploaded_image_bytes: Bytes of uploaded image
+        family_members: List of dicts with id, name, relationship, profile_photo_url
+        references: Output of load_reference_photos, if already loaded
+    
+    Returns:
+        {
+            "faces": [
+                {
+                    "box": {"x", "y", "width", "height"} (fractions of the image) or None,
+                    "match": "found" | "unknown",
+                    "family_member_id": "uuid or null",
+                    "name": "...", "relationship": "...",
+                    "confidence": "high" | "medium" | "low" | "none"
+                },
+                ...
+            ],
+            "no_references": True when no member has a usable reference photo,
+            "error": None
+        }
+    """
+    try:
+        from PIL import Image
+        
+        model = get_genai().GenerativeModel('gemini-2.5-flash')
+        uploaded_image = Image.open(io.BytesIO(uploaded_image_bytes))
+        
+        if references is None:
+            references = load_reference_photos(family_members)
+        if not references:
+            # Not a failure - nothing to compare against (yet)
+            return {"faces": [], "no_references": True, "error": None}
+        
+        member_mapping = {number: member for number, member, _ in references}
+        roster = "".join(
+            f"{number}. {member['name']} ({member['relationship']}) - reference photo {number}\n"
+            for number, member, _ in references
+        )
+        
+        prompt = f"""The patient uploaded the FIRST image, which may show several people.
+The following images are reference photos of these family members, in order:
+
+{roster}
+INSTRUCTIONS:
+1. Find EVERY human face in the FIRST image
+2. For each face, compare it with all the reference photos
+3. Consider: facial features, age, gender, hair color/style, overall appearance
+4. Each family member can match at most one face
+5. If a face doesn't clearly match anyone, its match is "unknown"
+
+IMPORTANT:
+- Only return "found" if you're reasonably confident
+- Consider that photos may be from different times/angles/lighting
+
+Return ONLY valid JSON:
+{{
+    "faces": [
+        {{
+            "box_2d": [ymin, xmin, ymax, xmax] (face bounding box, integers 0-1000),
+            "match": "found" or "unknown",
+            "matched_number": 1-N (the number from the list above, if found),
+            "confidence": "high" or "medium" or "low" or "none"
+        }}
+    ]
+}}
+
+Return ONLY the JSON, no extra text."""
+
+        content = [uploaded_image] + [image for _, _, image in references] + [prompt]
+        with span('gemini.generate_content', model=model.model_name, purpose='identify_group_photo', images=len(content) - 1):
+            response = model.generate_content(content)
+        
+        try:
+            result = _parse_json(response.text)
+        except json.JSONDecodeError:
+            return {"faces": [], "error": "Could not parse Gemini response"}
+        
+        faces = []
+        claimed = set()
+        for face in result.get('faces') or []:
+            member = member_mapping.get(face.get('matched_number')) if face.get('match') == 'found' else None
+            if member and member['id'] in claimed:
+                member = None  # one face per person - keep the first match
+            if member:
+                claimed.add(member['id'])
+            faces.append({
+                "box": _box(face.get('box_2d')),
+                "match": "found" if member else "unknown",
+                "family_member_id": member['id'] if member else None,
+                "name": member['name'] if member else None,
+                "relationship": member['relationship'] if member else None,
+                "confidence": face.get('confidence', 'medium') if member else face.get('confidence', 'none'),
+            })
+        
+        return {"faces": faces, "error": None}
+        
+    except Exception as e:
+        print(f"Group photo recognition error: {e}")
+        return {"faces": [], "error": str(e)}
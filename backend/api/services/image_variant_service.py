@@ -0,0 +1,117 @@
+# backend/api/services/image_variant_service.py
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .supabase_client import supabase, upload_file
+from ..tracing import propagate, span
+import io
+import os
+import requests
+
+# Uploads of one photo's variants go in parallel; profile photo jobs run
+# one at a time on their own pool so they never wait on a pool they occupy
+_variant_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='image-variant')
+_profile_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profile-variants')
+
+
+def create_variants(image_bytes):
+    """
+    Resized, compressed copies of an image, one per settings.IMAGE_VARIANT_SIZES
+    entry (longest edge in pixels, never upscaled), encoded as IMAGE_VARIANT_FORMAT.
+
+    Returns:
+        {"thumb": bytes, "screen": bytes, ...}, or {} if the image could not be decoded
+    """
+    try:
+        from PIL import Image, ImageOps
+
+        with span('image.variants', bytes=len(image_bytes)):
+            image = Image.open(io.BytesIO(image_bytes))
+            image = ImageOps.exif_transpose(image)  # bake in phone rotation; EXIF is dropped
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+            variants = {}
+            for name, size in settings.IMAGE_VARIANT_SIZES.items():
+                resized = image.copy()
+                resized.thumbnail((size, size), Image.LANCZOS)
+                buffer = io.BytesIO()
+                resized.save(buffer, format=settings.IMAGE_VARIANT_FORMAT, quality=settings.IMAGE_VARIANT_QUALITY, method=4)
+                variants[name] = buffer.getvalue()
+            return variants
+    except Exception as e:
+        print(f"Image variant error: {e}")
+        return {}
+
+
+def variant_path(path, name):
+    """memory-photos/abc_photo.jpg -> memory-photos/abc_photo_thumb.webp"""
+    stem, _ = os.path.splitext(path)
+    return f"{stem}_{name}.{settings.IMAGE_VARIANT_FORMAT.lower()}"
+
+
+def upload_with_variants(bucket: str, path: str, image_bytes):
+    """
+    Upload the original image plus its resized variants
+
+    Returns:
+        {"url": original, "thumb_url": ..., "screen_url": ..., "error": None}
+        Variant URLs are None if the image could not be resized; the
+        original upload still counts as success.
+    """
+    variants = create_variants(image_bytes)
+    futures = {
+        name: _variant_executor.submit(propagate(upload_file), bucket, variant_path(path, name), data)
+        for name, data in variants.items()
+    }
+
+    result = upload_file(bucket, path, image_bytes)
+    for name in settings.IMAGE_VARIANT_SIZES:
+        variant = futures[name].result() if name in futures else {"url": None}
+        result[f"{name}_url"] = variant['url']
+    return result
+
+
+def upload_variants(bucket: str, path: str, image_bytes):
+    """Upload only the variants of an already-stored image -> {"thumb_url": ..., ...}"""
+    variants = create_variants(image_bytes)
+    futures = {
+        name: _variant_executor.submit(propagate(upload_file), bucket, variant_path(path, name), data)
+        for name, data in variants.items()
+    }
+    return {f"{name}_url": future.result()['url'] for name, future in futures.items()}
+
+
+def storage_path(public_url, bucket):
+    """Object path inside bucket for a Supabase public URL, or None"""
+    marker = f"/object/public/{bucket}/"
+    if not public_url or marker not in public_url:
+        return None
+    return public_url.split(marker, 1)[1].split('?', 1)[0]
+
+
+def add_profile_photo_variants(family_member_id, profile_photo_url):
+    """
+    Download a member's profile photo (uploaded by the app straight to
+    storage) and record thumbnail/screen variants on the member row.
+    """
+    try:
+        path = storage_path(profile_photo_url, 'profiles') or f"profile-photos/{family_member_id}"
+        with span('http.download', purpose='profile_photo'):
+            response = requests.get(profile_photo_url, timeout=10)
+        response.raise_for_status()
+
+        urls = upload_variants('profiles', path, response.content)
+        if not any(urls.values()):
+            return {"error": "Could not create variants"}
+
+        supabase.table('family_members').update({
+            f"profile_photo_{name}": url for name, url in urls.items()
+        }).eq('id', family_member_id).execute()
+        return {"error": None}
+    except Exception as e:
+        print(f"Profile photo variants failed for {family_member_id}: {e}")
+        return {"error": str(e)}
+
+
+def add_profile_photo_variants_in_background(family_member_id, profile_photo_url):
+    _profile_executor.submit(propagate(add_profile_photo_variants), family_member_id, profile_photo_url)
@@ -0,0 +1,325 @@
+# backend/api/services/import_service.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from django.conf import settings
+from django.core.cache import cache
+from .supabase_client import supabase, upload_file
+from .image_variant_service import upload_with_variants
+from .voice_service import download_voice_sample, synthesize_batch
+from .memory_index_service import index_memories
+from ..admission import get_limiter
+from ..tracing import propagate, span
+import json
+import os
+import socket
+import time
+import uuid
+import zipfile
+
+MANIFEST_NAME = 'manifest.json'
+LOCK_KEY = 'memory-import:lock'
+WAIT_INTERVAL = 2  # seconds between tries for the import lock / a TTS slot
+UNFINISHED = ['queued', 'running']
+
+# Imports run one at a time in the background (synthesis is CPU-bound) -
+# per process through this executor, across workers through LOCK_KEY in the
+# shared cache. Photo and audio uploads inside an import fan out over a
+# separate pool.
+_job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='memory-import')
+_upload_executor = ThreadPoolExecutor(max_workers=settings.IMPORT_UPLOAD_WORKERS, thread_name_prefix='import-upload')
+
+# This process's name on the jobs it owns (memory_imports.worker)
+WORKER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_progress = {}  # import_id -> progress dict, for jobs owned by this process
+
+
+def _read_member(archive, name, budget):
+    """Bytes of one archive member, without inflating more than budget bytes"""
+    with archive.open(name) as member:
+        data = member.read(budget + 1)
+    if len(data) > budget:
+        raise ValueError(f'Archive is larger than {settings.IMPORT_MAX_BYTES} bytes uncompressed')
+    return data
+
+
+def read_archive(archive_file):
+    """
+    Read a zip archive with a manifest.json and the photos it references.
+    IMPORT_MAX_MEMORIES and IMPORT_MAX_BYTES (uncompressed) are enforced
+    while reading, before any photo is extracted past the limit.
+
+    Returns:
+        (manifest list, {archive path: bytes})
+
+    Raises:
+        ValueError: if the archive or manifest is invalid or over the limits
+    """
+    try:
+        with zipfile.ZipFile(archive_file) as archive:
+            names = set(archive.namelist())
+            if MANIFEST_NAME not in names:
+                raise ValueError(f'Archive has no {MANIFEST_NAME}')
+
+            budget = settings.IMPORT_MAX_BYTES
+            raw_manifest = _read_member(archive, MANIFEST_NAME, budget)
+            budget -= len(raw_manifest)
+
+            manifest = json.loads(raw_manifest)
+            if not isinstance(manifest, list):
+                raise ValueError(f'{MANIFEST_NAME} must be a list of memories')
+            if len(manifest) > settings.IMPORT_MAX_MEMORIES:
+                raise ValueError(f'At most {settings.IMPORT_MAX_MEMORIES} memories per import')
+
+            files = {}
+            for item in manifest:
+                for name in item.get('photos', []) if isinstance(item, dict) else []:
+                    if name in files:
+                        continue
+                    if name not in names:
+                        raise ValueError(f'Photo not found in archive: {name}')
+                    files[name] = _read_member(archive, name, budget)
+                    budget -= len(files[name])
+            return manifest, files
+    except zipfile.BadZipFile:
+        raise ValueError('Archive is not a valid zip file')
+    except json.JSONDecodeError:
+        raise ValueError(f'{MANIFEST_NAME} is not valid JSON')
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _fail_stale(import_id=None):
+    """Mark unfinished jobs whose worker stopped reporting as failed"""
+    cutoff = (_now() - timedelta(seconds=settings.IMPORT_STALE_SECONDS)).isoformat()
+    query = supabase.table('memory_imports').update({
+        'status': 'failed',
+        'error': 'Import was interrupted (server restarted)'
+    }).in_('status', UNFINISHED).lt('heartbeat_at', cutoff)
+    if import_id:
+        query = query.eq('id', import_id)
+    for row in query.execute().data or []:
+        print(f"Memory import {row['id']} interrupted (worker {row['worker']} stopped)")
+
+
+def get_progress(import_id):
+    """Progress dict for an import, or None if unknown"""
+    _fail_stale(import_id)
+    result = supabase.table('memory_imports').select('status, progress, error').eq('id', import_id).execute()
+    if not result.data:
+        return None
+    row = result.data[0]
+    progress = dict(row['progress'], status=row['status'])
+    if row['error']:
+        progress['errors'] = progress.get('errors', []) + [row['error']]
+    return progress
+
+
+def _heartbeat():
+    """Tell the stale sweep this process is alive - covers its queued jobs too"""
+    supabase.table('memory_imports').update({
+        'heartbeat_at': _now().isoformat()
+    }).eq('worker', WORKER).in_('status', UNFINISHED).execute()
+    # Keep the import lock only while its holder (one of ours) is alive
+    if cache.get(LOCK_KEY) in _progress:
+        cache.touch(LOCK_KEY, settings.IMPORT_STALE_SECONDS)
+
+
+def _update(import_id, **changes):
+    progress = _progress.setdefault(import_id, {})
+    progress.update(changes)
+    supabase.table('memory_imports').update({
+        'status': progress['status'],
+        'progress': {key: value for key, value in progress.items() if key != 'status'},
+    }).eq('id', import_id).execute()
+    _heartbeat()
+    return progress
+
+
+def start_import(items: list, files: dict, members: dict):
+    """
+    Insert memories in bulk and queue photos, indexing and synthesis
+
+    Args:
+        items: Validated memories (family_member_id, title, content, photos)
+        files: Photo name -> bytes, for the names referenced by items
+        members: family_member_id -> member row (patient_id, voice_sample_url)
+
+    Returns:
+        {"import_id": "...", "memory_ids": [...], "error": None}
+    """
+    try:
+        # One insert for every memory; rows come back in the same order
+        rows = supabase.table('memories').insert([
+            {
+                'family_member_id': str(item['family_member_id']),
+                'title': item['title'],
+                'content': item['content']
+            }
+            for item in items
+        ]).execute().data
+
+        import_id = str(uuid.uuid4())
+        _progress[import_id] = {
+            'status': 'queued',
+            'memory_ids': [row['id'] for row in rows],
+            'memories_total': len(rows),
+            'photos_total': sum(len(item.get('photos', [])) for item in items),
+            'photos_uploaded': 0,
+            'audio_total': len(rows),
+            'audio_done': 0,
+            'errors': []
+        }
+        _fail_stale()
+        supabase.table('memory_imports').insert({
+            'id': import_id,
+            'status': 'queued',
+            'progress': {key: value for key, value in _progress[import_id].items() if key != 'status'},
+            'worker': WORKER,
+            'heartbeat_at': _now().isoformat(),
+        }).execute()
+
+        # The background job stays on the importing request's trace
+        _job_executor.submit(propagate(_run_import), import_id, items, rows, files, members)
+
+        return {"import_id": import_id, "memory_ids": [row['id'] for row in rows], "error": None}
+    except Exception as e:
+        print(f"Memory import error: {e}")
+        return {"import_id": None, "memory_ids": [], "error": str(e)}
+
+
+def _run_import(import_id, items, rows, files, members):
+    with span('import.run', import_id=import_id, memories=len(rows)):
+        # One import at a time across all workers
+        while not cache.add(LOCK_KEY, import_id, settings.IMPORT_STALE_SECONDS):
+            _heartbeat()
+            time.sleep(WAIT_INTERVAL)
+        try:
+            _run_import_steps(import_id, items, rows, files, members)
+        finally:
+            if cache.get(LOCK_KEY) == import_id:
+                cache.delete(LOCK_KEY)
+            _progress.pop(import_id, None)
+
+
+def _run_import_steps(import_id, items, rows, files, members):
+    errors = []
+    try:
+        _update(import_id, status='running')
+
+        uploaded = _upload_photos(items, rows, files, errors)
+        _update(import_id, photos_uploaded=uploaded, errors=errors)
+
+        # Index per patient, one embed call each
+        by_patient = {}
+        for row in rows:
+            patient_id = members[row['family_member_id']]['patient_id']
+            by_patient.setdefault(patient_id, []).append(row)
+        for patient_id, patient_rows in by_patient.items():
+            result = index_memories(patient_id, patient_rows)
+            if result['error']:
+                errors.append(f"Indexing failed: {result['error']}")
+
+        _synthesize(import_id, rows, members, errors)
+
+        _update(import_id, status='completed', errors=errors)
+    except Exception as e:
+        print(f"Memory import {import_id} failed: {e}")
+        errors.append(str(e))
+        _update(import_id, status='failed', errors=errors)
+
+
+def _upload_photos(items, rows, files, errors):
+    """Upload every photo concurrently, then insert memory_photos in one call"""
+    jobs = []
+    for item, row in zip(items, rows):
+        for name in item.get('photos', []):
+            path = f"memory-photos/{row['id']}_{uuid.uuid4()}_{os.path.basename(name)}"
+            future = _upload_executor.submit(propagate(upload_with_variants), 'profiles', path, files[name])
+            jobs.append((row['id'], name, future))
+
+    photo_rows = []
+    for memory_id, name, future in jobs:
+        result = future.result()
+        if result['url']:
+            photo_rows.append({
+                'memory_id': memory_id,
+                'photo_url': result['url'],
+                'thumb_url': result['thumb_url'],
+                'screen_url': result['screen_url']
+            })
+        else:
+            errors.append(f"Photo {name} failed: {result['error']}")
+
+    if photo_rows:
+        supabase.table('memory_photos').insert(photo_rows).execute()
+    return len(photo_rows)
+
+
+def _synthesize_batch(texts, voice_sample_url):
+    """
+    generate_audio_batch, one text per TTS admission slot. A slot is only
+    taken when no interactive request is queued for one, and given back
+    after every text, so an interactive request waits for at most one
+    synthesis rather than a whole batch.
+    """
+    try:
+        voice_bytes = download_voice_sample(voice_sample_url)
+    except Exception as e:
+        return {"results": [], "error": str(e)}
+
+    limiter = get_limiter('tts')
+    results = []
+    for text in texts:
+        while not limiter.acquire_idle():
+            _heartbeat()
+            time.sleep(WAIT_INTERVAL)
+        try:
+            result = synthesize_batch([text], voice_bytes)
+        finally:
+            limiter.release()
+        if result['error']:
+            return result
+        results.extend(result['results'])
+    return {"results": results, "error": None}
+
+
+def _synthesize(import_id, rows, members, errors):
+    """Generate audio in batches grouped by family member (one voice per batch)"""
+    by_member = {}
+    for row in rows:
+        by_member.setdefault(row['family_member_id'], []).append(row)
+
+    done = 0
+    batch_size = settings.IMPORT_TTS_BATCH_SIZE
+    for member_id, member_rows in by_member.items():
+        voice_sample_url = members[member_id]['voice_sample_url']
+
+        for start in range(0, len(member_rows), batch_size):
+            batch = member_rows[start:start + batch_size]
+            result = _synthesize_batch([row['content'] for row in batch], voice_sample_url)
+            if result['error']:
+                errors.append(f"Audio failed for {len(batch)} memories: {result['error']}")
+                continue
+
+            uploads = []
+            for row, audio_result in zip(batch, result['results']):
+                if audio_result['error']:
+                    errors.append(f"Audio failed for memory {row['id']}: {audio_result['error']}")
+                    continue
+                audio_path = f"memory-audio/{row['id']}.wav"
+                uploads.append((row['id'], _upload_executor.submit(propagate(upload_file), 'memory-audio', audio_path, audio_result['audio'])))
+
+            for memory_id, future in uploads:
+                audio_upload = future.result()
+                if audio_upload['error']:
+                    errors.append(f"Audio upload failed for memory {memory_id}: {audio_upload['error']}")
+                    continue
+                supabase.table('memories').update({
+                    'audio_url': audio_upload['url']
+                }).eq('id', memory_id).execute()
+                done += 1
+
+            _update(import_id, audio_done=done, errors=errors)
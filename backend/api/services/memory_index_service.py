@@ -0,0 +1,262 @@
+# backend/api/services/memory_index_service.py
+
+from django.conf import settings
+from .supabase_client import supabase
+from .gemini_service import get_genai
+from ..tracing import propagate, span
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import os
+import threading
+import time
+
+EMBED_BATCH_SIZE = 100  # max texts per embed_content call
+ID_DTYPE = 'U36'  # UUIDs, stored fixed-width so the .npz loads without pickle
+
+_lock = threading.Lock()
+_loaded = {}  # patient_id -> (mtime, index dict)
+
+# Missing indexes are built off the request path, one at a time
+_rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='memory-index')
+_rebuilding = set()  # patient_ids queued or running
+_failed = {}  # patient_id -> monotonic time of the last failed rebuild
+
+
+def _memory_text(memory):
+    return f"{memory.get('title', '')}\n{memory.get('content', '')}".strip()
+
+
+def _embed(texts, task_type):
+    """Unit-length float32 embeddings, one row per text"""
+    genai = get_genai()
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start:start + EMBED_BATCH_SIZE]
+        with span('gemini.embed_content', model=settings.MEMORY_EMBEDDING_MODEL, texts=len(batch)):
+            result = genai.embed_content(
+                model=settings.MEMORY_EMBEDDING_MODEL,
+                content=batch,
+                task_type=task_type
+            )
+        vectors.extend(result['embedding'])
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _index_path(patient_id):
+    return os.path.join(settings.MEMORY_INDEX_DIR, f"{patient_id}.npz")
+
+
+def _empty_index():
+    return {
+        'ids': np.array([], dtype=ID_DTYPE),
+        'member_ids': np.array([], dtype=ID_DTYPE),
+        'vectors': np.zeros((0, 0), dtype=np.float32),
+    }
+
+
+def _load(patient_id):
+    """Index for a patient (cached in-process until the file changes), or None"""
+    path = _index_path(patient_id)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _loaded.get(patient_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            index = {
+                'ids': data['ids'],
+                'member_ids': data['member_ids'],
+                'vectors': data['vectors'],
+            }
+    except (OSError, ValueError) as e:
+        # Unreadable, or an old object-dtype file - treat as missing
+        print(f"Memory index load error: {e}")
+        return None
+    _loaded[patient_id] = (mtime, index)
+    return index
+
+
+def _save(patient_id, index):
+    os.makedirs(settings.MEMORY_INDEX_DIR, exist_ok=True)
+    path = _index_path(patient_id)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez(temp_path, ids=index['ids'], member_ids=index['member_ids'], vectors=index['vectors'])
+    os.replace(temp_path, path)
+    _loaded[patient_id] = (os.path.getmtime(path), index)
+
+
+def rebuild_index(patient_id: str):
+    """Embed every memory of a patient from scratch"""
+    try:
+        result = supabase.table('memories').select(
+            'id, family_member_id, title, content, family_members!inner (patient_id)'
+        ).eq('family_members.patient_id', patient_id).execute()
+        memories = result.data or []
+
+        index = _empty_index()
+        if memories:
+            index = {
+                'ids': np.array([m['id'] for m in memories], dtype=ID_DTYPE),
+                'member_ids': np.array([m['family_member_id'] for m in memories], dtype=ID_DTYPE),
+                'vectors': _embed([_memory_text(m) for m in memories], 'retrieval_document'),
+            }
+
+        with _lock:
+            _save(patient_id, index)
+        _failed.pop(patient_id, None)
+        return {"count": len(memories), "error": None}
+    except Exception as e:
+        print(f"Memory index rebuild error: {e}")
+        _failed[patient_id] = time.monotonic()
+        return {"count": 0, "error": str(e)}
+
+
+def _background_rebuild(patient_id):
+    try:
+        rebuild_index(patient_id)
+    finally:
+        with _lock:
+            _rebuilding.discard(patient_id)
+
+
+def schedule_rebuild(patient_id: str):
+    """
+    Queue a background rebuild of the patient's index. No-op while one is
+    queued, or for MEMORY_INDEX_RETRY_SECONDS after a failed one.
+
+    Returns:
+        True if a rebuild is queued or running
+    """
+    with _lock:
+        if patient_id in _rebuilding:
+            return True
+        failed_at = _failed.get(patient_id)
+        if failed_at is not None and time.monotonic() - failed_at < settings.MEMORY_INDEX_RETRY_SECONDS:
+            return False
+        _rebuilding.add(patient_id)
+    _rebuild_executor.submit(propagate(_background_rebuild), patient_id)
+    return True
+
+
+def index_memories(patient_id: str, memories: list):
+    """Add (or replace) memories in the patient's index with one embed call"""
+    if not memories:
+        return {"count": 0, "error": None}
+
+    try:
+        if _load(patient_id) is None:
+            # No index yet - the background build picks these memories up too
+            schedule_rebuild(patient_id)
+            return {"count": 0, "error": None}
+
+        vectors = _embed([_memory_text(m) for m in memories], 'retrieval_document')
+        new_ids = np.array([m['id'] for m in memories], dtype=ID_DTYPE)
+        new_member_ids = np.array([m['family_member_id'] for m in memories], dtype=ID_DTYPE)
+
+        with _lock:
+            index = _load(patient_id)
+            if index is None:
+                return {"count": 0, "error": None}
+            keep = ~np.isin(index['ids'], new_ids)
+            existing = index['vectors'][keep] if index['vectors'].size else np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            _save(patient_id, {
+                'ids': np.concatenate([index['ids'][keep], new_ids]),
+                'member_ids': np.concatenate([index['member_ids'][keep], new_member_ids]),
+                'vectors': np.vstack([existing, vectors]),
+            })
+        return {"count": len(memories), "error": None}
+    except Exception as e:
+        print(f"Memory index error: {e}")
+        return {"count": 0, "error": str(e)}
+
+
+def index_memory(patient_id: str, memory: dict):
+    """Add (or replace) one memory in the patient's index"""
+    return index_memories(patient_id, [memory])
+
+
+def remove_memories(patient_id: str, memory_ids: list):
+    """Drop deleted memories from the patient's index"""
+    if not memory_ids:
+        return {"count": 0, "error": None}
+
+    try:
+        with _lock:
+            index = _load(patient_id)
+            if index is None:
+                return {"count": 0, "error": None}
+
+            keep = ~np.isin(index['ids'], np.array(memory_ids, dtype=ID_DTYPE))
+            if keep.all():
+                return {"count": 0, "error": None}
+            _save(patient_id, {
+                'ids': index['ids'][keep],
+                'member_ids': index['member_ids'][keep],
+                'vectors': index['vectors'][keep] if index['vectors'].size else index['vectors'],
+            })
+        return {"count": int((~keep).sum()), "error": None}
+    except Exception as e:
+        print(f"Memory index error: {e}")
+        return {"count": 0, "error": str(e)}
+
+
+def search_memories(patient_id: str, query: str, top_k: int = None, family_member_id: str = None):
+    """
+    Most relevant memories for a question, by cosine similarity
+
+    Args:
+        patient_id: Patient whose memories to search
+        query: Patient's question
+        top_k: Max results (defaults to settings.MEMORY_SEARCH_TOP_K)
+        family_member_id: Optional - only memories written by this member
+
+    Returns:
+        {
+            "results": [{"memory_id", "family_member_id", "score"}, ...] best first,
+            "indexed": False while the patient has no index yet (a build is
+                       queued in the background; callers fall back to recent memories),
+            "error": None
+        }
+    """
+    top_k = top_k or settings.MEMORY_SEARCH_TOP_K
+
+    try:
+        index = _load(patient_id)
+        if index is None:
+            schedule_rebuild(patient_id)
+            return {"results": [], "indexed": False, "error": None}
+        if not len(index['ids']):
+            return {"results": [], "indexed": True, "error": None}
+
+        query_vector = _embed([query], 'retrieval_query')[0]
+        scores = index['vectors'] @ query_vector
+
+        if family_member_id:
+            scores = np.where(index['member_ids'] == str(family_member_id), scores, -np.inf)
+
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        results = [
+            {
+                "memory_id": str(index['ids'][i]),
+                "family_member_id": str(index['member_ids'][i]),
+                "score": float(scores[i])
+            }
+            for i in best
+            if scores[i] >= settings.MEMORY_SEARCH_MIN_SCORE
+        ]
+        return {"results": results, "indexed": True, "error": None}
+    except Exception as e:
+        print(f"Memory search error: {e}")
+        return {"results": [], "indexed": True, "error": str(e)}
@@ -0,0 +1,138 @@
+# backend/api/services/photo_cache_service.py
+
+from django.conf import settings
+from django.core.cache import cache
+import hashlib
+import io
+import time
+
+HASH_SIZE = 8  # 8x8 difference hash -> 64 bits
+
+
+def compute_image_hash(image_bytes):
+    """
+    Perceptual difference hash (dHash) of an image.
+
+    Near-identical images (re-taken camera frames, the same printed photo
+    under slightly different light) produce hashes a few bits apart.
+
+    Returns:
+        64-bit int, or None if the image could not be decoded
+    """
+    try:
+        from PIL import Image, ImageOps
+
+        image = Image.open(io.BytesIO(image_bytes))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+        pixels = list(image.getdata())
+
+        value = 0
+        for row in range(HASH_SIZE):
+            for col in range(HASH_SIZE):
+                left = pixels[row * (HASH_SIZE + 1) + col]
+                right = pixels[row * (HASH_SIZE + 1) + col + 1]
+                value = (value << 1) | (1 if left > right else 0)
+        return value
+    except Exception as e:
+        print(f"Image hash error: {e}")
+        return None
+
+
+def hamming_distance(a: int, b: int):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+
+def roster_fingerprint(family_members: list):
+    """
+    Fingerprint of the reference photos an identification was made against.
+    Changes whenever a member is added/removed or a profile photo changes.
+    """
+    parts = sorted(
+        f"{member['id']}:{member.get('profile_photo_url') or ''}"
+        for member in family_members
+    )
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _version_key(patient_id):
+    return f"photo-id-version:{patient_id}"
+
+
+def roster_version(patient_id):
+    """
+    Current roster version for the patient's cache entries. Read it before
+    identifying and pass it to cache_identification: a result computed
+    against an older roster then lands under a key nobody reads.
+    """
+    key = _version_key(patient_id)
+    # Seeded from the clock so an evicted counter doesn't revive old keys
+    cache.add(key, int(time.time() * 1000), None)
+    return cache.get(key)
+
+
+def _cache_key(patient_id, mode, version):
+    return f"photo-id:{mode}:{patient_id}:{version}"
+
+
+def get_cached_identification(patient_id, image_hash, fingerprint, version, mode='single'):
+    """
+    Look up a previous identification for a perceptually similar image.
+
+    Returns the cached result dict, or None on a miss. Entries recorded
+    against a different roster fingerprint are dropped.
+    """
+    if image_hash is None:
+        return None
+
+    entry = cache.get(_cache_key(patient_id, mode, version))
+    if not entry:
+        return None
+
+    if entry['fingerprint'] != fingerprint:
+        cache.delete(_cache_key(patient_id, mode, version))
+        return None
+
+    tolerance = settings.PHOTO_ID_HASH_TOLERANCE
+    best = None
+    best_distance = tolerance + 1
+    for cached_hash, result in entry['results']:
+        distance = hamming_distance(cached_hash, image_hash)
+        if distance < best_distance:
+            best, best_distance = result, distance
+
+    return best
+
+
+def cache_identification(patient_id, image_hash, fingerprint, version, result, mode='single'):
+    """
+    Store an identification result for this patient under the image hash.
+    Dropped if the roster changed (version moved on) since it was computed.
+    """
+    if image_hash is None or result.get('error'):
+        return
+    if cache.get(_version_key(patient_id)) != version:
+        return
+
+    key = _cache_key(patient_id, mode, version)
+    entry = cache.get(key)
+    if not entry or entry['fingerprint'] != fingerprint:
+        entry = {'fingerprint': fingerprint, 'results': []}
+
+    results = [(h, r) for h, r in entry['results'] if h != image_hash]
+    results.append((image_hash, result))
+    entry['results'] = results[-settings.PHOTO_ID_CACHE_MAX_ENTRIES:]
+
+    cache.set(key, entry, settings.PHOTO_ID_CACHE_TTL)
+
+
+def invalidate_patient(patient_id):
+    """Forget all cached identifications for a patient (moves the roster version on)"""
+    key = _version_key(patient_id)
+    roster_version(patient_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted in between - a fresh clock seed is newer than any old version
+        cache.set(key, int(time.time() * 1000), None)
@@ -0,0 +1,97 @@
+# backend/api/services/speech_service.py
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from .supabase_client import upload_file
+from .voice_service import generate_audio_batch
+import hashlib
+import io
+import re
+import wave
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+# Audio blobs stay out of the default cache (see settings.CACHES)
+cache = ConnectionProxy(caches, 'speech')
+
+
+def _digest(value: str):
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+def _normalize(text: str):
+    return " ".join(text.split())
+
+
+def split_sentences(text: str):
+    return [s for s in SENTENCE_SPLIT.split(_normalize(text)) if s]
+
+
+def _concat_wavs(parts: list):
+    """Join WAV files that share the same format into one"""
+    frames = []
+    params = None
+    for part in parts:
+        with wave.open(io.BytesIO(part), "rb") as f:
+            params = params or f.getparams()
+            frames.append(f.readframes(f.getnframes()))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setparams(params)
+        f.writeframes(b"".join(frames))
+    return buffer.getvalue()
+
+
+def speak_answer(text: str, voice_sample_url: str):
+    """
+    Audio of an answer in a cloned voice, cached by (text, voice)
+
+    Whole answers are cached as uploaded files; individual sentences are
+    cached as audio so a new answer only synthesizes the sentences not heard
+    before in that voice.
+
+    Returns:
+        {"audio_url": "...", "cached": true/false, "error": None}
+    """
+    try:
+        text = _normalize(text)
+        voice_key = _digest(voice_sample_url)
+        answer_key = f"speech:answer:{voice_key}:{_digest(text)}"
+
+        audio_url = cache.get(answer_key)
+        if audio_url:
+            return {"audio_url": audio_url, "cached": True, "error": None}
+
+        sentences = split_sentences(text)
+        sentence_keys = [f"speech:sentence:{voice_key}:{_digest(s)}" for s in sentences]
+        cached_parts = cache.get_many(sentence_keys)
+
+        missing = [(s, key) for s, key in zip(sentences, sentence_keys) if key not in cached_parts]
+        if missing:
+            result = generate_audio_batch([s for s, _ in missing], voice_sample_url)
+            if result['error']:
+                raise Exception(result['error'])
+
+            new_parts = {}
+            for (sentence, key), item in zip(missing, result['results']):
+                if item['error']:
+                    raise Exception(item['error'])
+                new_parts[key] = item['audio']
+            cache.set_many(new_parts, settings.SPEECH_CACHE_TTL)
+            cached_parts.update(new_parts)
+
+        audio = _concat_wavs([cached_parts[key] for key in sentence_keys])
+
+        path = f"answer-audio/{voice_key}/{_digest(text)}.wav"
+        upload = upload_file('memory-audio', path, audio)
+        if upload['error']:
+            raise Exception(upload['error'])
+
+        cache.set(answer_key, upload['url'], settings.SPEECH_CACHE_TTL)
+        return {"audio_url": upload['url'], "cached": False, "error": None}
+
+    except Exception as e:
+        print(f"Answer speech error: {e}")
+        return {"audio_url": None, "cached": False, "error": str(e)}
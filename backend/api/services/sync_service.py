@@ -0,0 +1,158 @@
+# backend/api/services/sync_service.py
+
+from .supabase_client import supabase
+from concurrent.futures import ThreadPoolExecutor
+from ..tracing import propagate
+import base64
+import json
+
+SYNC_PAGE_SIZE = 500
+
+# table -> (select, column holding the patient id for the filter)
+SYNC_TABLES = {
+    'family_members': ('*', 'patient_id'),
+    'memories': ('*, family_members!inner (patient_id)', 'family_members.patient_id'),
+    'memory_photos': ('*, memories!inner (family_members!inner (patient_id))', 'memories.family_members.patient_id'),
+    'family_videos': ('*', 'patient_id'),
+}
+
+# Embedded resources only used for filtering - stripped from the output
+FILTER_EMBEDS = {
+    'memories': 'family_members',
+    'memory_photos': 'memories',
+}
+
+
+def encode_cursor(positions: dict):
+    """Opaque cursor string from per-table [timestamp, id] positions"""
+    return base64.urlsafe_b64encode(json.dumps(positions).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Per-table [timestamp, id] positions from a cursor string. Raises ValueError if malformed."""
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError('Invalid sync cursor')
+    if not isinstance(positions, dict):
+        raise ValueError('Invalid sync cursor')
+    return positions
+
+
+def _after(query, column, position):
+    """
+    Keyset filter (column, id) > position. Ordering on the pair means a page
+    can end inside a run of rows with the same timestamp (a bulk insert)
+    without the next page skipping the rest of the run.
+    """
+    if not position:
+        return query
+    if isinstance(position, str):
+        # Cursor from before the id tie-breaker
+        return query.gt(column, position)
+    timestamp, row_id = position
+    return query.or_(f'{column}.gt."{timestamp}",and({column}.eq."{timestamp}",id.gt.{row_id})')
+
+
+def _position(row, column):
+    return [row[column], row['id']]
+
+
+def _fetch_table(table, patient_id, since):
+    """One page of a table's rows updated after the `since` position (all rows if None)"""
+    columns, patient_column = SYNC_TABLES[table]
+    query = supabase.table(table).select(columns).eq(patient_column, patient_id)
+    query = _after(query, 'updated_at', since)
+    rows = query.order('updated_at').order('id').limit(SYNC_PAGE_SIZE).execute().data or []
+
+    embed = FILTER_EMBEDS.get(table)
+    if embed:
+        for row in rows:
+            row.pop(embed, None)
+    return rows
+
+
+def fetch_changes(patient_id: str, cursor: str = None):
+    """
+    Rows created, updated or deleted for a patient since a cursor
+
+    Args:
+        patient_id: Patient whose data the device mirrors
+        cursor: Cursor from the previous sync, or None for a full snapshot
+
+    Returns:
+        {
+            "changes": {table: [rows...]},
+            "deleted": [{"table_name", "record_id", "deleted_at"}, ...],
+            "cursor": "next cursor",
+            "has_more": true/false (call again with the new cursor),
+            "full": true/false (no cursor given - replace the local copy),
+            "error": None
+        }
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    positions = decode_cursor(cursor) if cursor else {}
+
+    try:
+        next_positions = dict(positions)
+        changes = {}
+        has_more = False
+
+        if not cursor:
+            # A snapshot supersedes every deletion so far. Read the tombstone
+            # position before the tables: a row deleted after this point may
+            # still be in the snapshot, and its tombstone must come after it.
+            latest = supabase.table('deleted_records').select('id, deleted_at').eq('patient_id', patient_id).order('deleted_at', desc=True).order('id', desc=True).limit(1).execute()
+            if latest.data:
+                next_positions['deleted_records'] = _position(latest.data[0], 'deleted_at')
+
+        # Tables are independent - query them concurrently
+        with ThreadPoolExecutor(max_workers=len(SYNC_TABLES)) as executor:
+            futures = {
+                table: executor.submit(propagate(_fetch_table), table, patient_id, positions.get(table))
+                for table in SYNC_TABLES
+            }
+            for table, future in futures.items():
+                rows = future.result()
+                changes[table] = rows
+                if rows:
+                    next_positions[table] = _position(rows[-1], 'updated_at')
+                if len(rows) == SYNC_PAGE_SIZE:
+                    has_more = True
+
+        # Tombstones only matter to devices that already hold a copy
+        deleted = []
+        if cursor:
+            query = supabase.table('deleted_records').select('id, table_name, record_id, deleted_at').eq('patient_id', patient_id)
+            query = _after(query, 'deleted_at', positions.get('deleted_records'))
+            deleted = query.order('deleted_at').order('id').limit(SYNC_PAGE_SIZE).execute().data or []
+
+            if len(deleted) == SYNC_PAGE_SIZE:
+                has_more = True
+
+        if deleted:
+            next_positions['deleted_records'] = _position(deleted[-1], 'deleted_at')
+            for record in deleted:
+                record.pop('id')
+
+        return {
+            "changes": changes,
+            "deleted": deleted,
+            "cursor": encode_cursor(next_positions),
+            "has_more": has_more,
+            "full": cursor is None,
+            "error": None
+        }
+
+    except Exception as e:
+        print(f"Sync error: {e}")
+        return {
+            "changes": {},
+            "deleted": [],
+            "cursor": cursor,
+            "has_more": False,
+            "full": False,
+            "error": str(e)
+        }
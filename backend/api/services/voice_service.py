@@ -1,52 +1,288 @@
-from TTS.api import TTS
+from collections import OrderedDict
+from django.conf import settings
+import hashlib
+import io
+import numpy as np
 import os
 import requests
 import tempfile
+import threading
+import wave
+from ..tracing import span
+
+
+def parse_cpu_list(value: str):
+    """CPU ids from a list like "0-3,6" """
+    cpus = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def configure_cpu():
+    """Apply torch thread counts and CPU affinity from settings"""
+    import torch
+    
+    if settings.TTS_CPU_AFFINITY and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, parse_cpu_list(settings.TTS_CPU_AFFINITY))
+    if settings.TTS_INTRA_OP_THREADS:
+        torch.set_num_threads(settings.TTS_INTRA_OP_THREADS)
+    if settings.TTS_INTER_OP_THREADS:
+        try:
+            torch.set_num_interop_threads(settings.TTS_INTER_OP_THREADS)
+        except RuntimeError as e:
+            # Only allowed before torch starts any inter-op work
+            print(f"Could not set inter-op threads: {e}")
+
+
+INFERENCE_MODES = ('fp32', 'int8')
+
+
+def _conv1d_to_linear(module):
+    """
+    Replace GPT-2 Conv1D layers with equivalent nn.Linear layers, so that
+    dynamic quantization (which only handles Linear) reaches the attention
+    and MLP blocks.
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+    
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+
+def quantize_model(model):
+    """int8 dynamic quantization of the XTTS GPT decoder (CPU only)"""
+    import torch
+    
+    _conv1d_to_linear(model.gpt)
+    torch.ao.quantization.quantize_dynamic(model.gpt, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+WARMUP_TEXT = "Hello."
+
+
+def _warm_up_inference(model):
+    """
+    One short synthesis, so the quantized kernels are prepared before the
+    model serves its first real request. Conditions on a second of quiet
+    noise - no voice sample needed.
+    """
+    import torch
+    
+    sample_rate = model.config.audio.output_sample_rate
+    reference = np.random.default_rng(0).normal(0, 0.05, sample_rate).astype(np.float32)
+    with torch.inference_mode(), span('tts.warm_up', mode='int8'):
+        gpt_cond_latent, speaker_embedding = _compute_latents(model, _wav_bytes(reference, sample_rate))
+        model.inference(WARMUP_TEXT, "en", gpt_cond_latent, speaker_embedding)
+
+
+# The model is loaded on first use (or by warm-up), so importing this
+# module doesn't pay for torch and XTTS
+tts = None
+_load_lock = threading.Lock()
+
+# XTTS is not safe to call from several threads at once
+_model_lock = threading.Lock()
+
+# Speaker conditioning per voice sample (keyed by content hash)
+_latents = OrderedDict()
+LATENTS_CACHE_SIZE = 32
+
+inference_mode = 'fp32'
+
+
+def get_tts():
+    """The XTTS model, loaded (in settings.TTS_INFERENCE_MODE) on first call"""
+    global tts, inference_mode
+    
+    if tts is None:
+        with _load_lock:
+            if tts is None:
+                from TTS.api import TTS
+                
+                configure_cpu()
+                print("Loading Coqui TTS model...")
+                model = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
+                print("Model loaded successfully!")
+                
+                if settings.TTS_INFERENCE_MODE not in INFERENCE_MODES:
+                    raise ValueError(f"Unknown TTS inference mode: {settings.TTS_INFERENCE_MODE}")
+                if settings.TTS_INFERENCE_MODE == 'int8':
+                    quantize_model(model.synthesizer.tts_model)
+                    _warm_up_inference(model.synthesizer.tts_model)
+                inference_mode = settings.TTS_INFERENCE_MODE
+                tts = model
+    return tts
+
+
+def set_inference_mode(mode: str):
+    """
+    Switch the loaded model to an inference mode. Quantization is one-way:
+    going back to fp32 needs a fresh process.
+    """
+    global inference_mode
+    
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown TTS inference mode: {mode}")
+    model = get_tts()
+    if mode == inference_mode:
+        return
+    if inference_mode != 'fp32':
+        raise ValueError(f"Cannot switch from {inference_mode} to {mode}")
+    
+    with _model_lock:
+        print(f"Switching TTS model to {mode}...")
+        quantize_model(model.synthesizer.tts_model)
+        _warm_up_inference(model.synthesizer.tts_model)
+        _latents.clear()
+        inference_mode = mode
 
-# Initialize model
-print("Loading Coqui TTS model...")
-tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
-print("Model loaded successfully!")
 
 def generate_audio_from_text(text: str, voice_sample_url: str):
-    """Generate TTS audio using voice cloning"""
-    temp_voice_path = None
-    temp_output_path = None
+    """
+    Generate TTS audio using voice cloning
+
+    Runs entirely on in-memory buffers (no shared temp files), so concurrent
+    calls from several threads or worker processes never see each other's
+    voice sample or output.
+    """
+    result = generate_audio_batch([text], voice_sample_url)
+    if result['error']:
+        return {"audio": None, "error": result['error']}
     
+    audio = result['results'][0]
+    return {"audio": audio['audio'], "error": audio['error']}
+
+
+def _wav_bytes(wav, sample_rate: int):
+    """16-bit PCM WAV file bytes from a float waveform"""
+    samples = np.asarray(wav.cpu() if hasattr(wav, 'cpu') else wav, dtype=np.float32)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def _compute_latents(model, voice_bytes: bytes):
+    """XTTS speaker conditioning for a voice sample (uncached)"""
     try:
-        # Download voice sample
+        # torchaudio reads the sample straight from memory
+        return model.get_conditioning_latents(audio_path=[io.BytesIO(voice_bytes)])
+    except Exception as e:
+        # Audio backends that only take paths get a unique per-call scratch file
+        print(f"In-memory voice sample load failed ({e}), using a scratch file")
+        fd, temp_voice_path = tempfile.mkstemp(suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(voice_bytes)
+            return model.get_conditioning_latents(audio_path=[temp_voice_path])
+        finally:
+            os.remove(temp_voice_path)
+
+
+def _conditioning_latents(voice_bytes: bytes):
+    """XTTS speaker conditioning for a voice sample, computed once per sample"""
+    key = hashlib.sha1(voice_bytes).hexdigest()
+    if key in _latents:
+        _latents.move_to_end(key)
+        return _latents[key]
+    
+    latents = _compute_latents(get_tts().synthesizer.tts_model, voice_bytes)
+    _latents[key] = latents
+    if len(_latents) > LATENTS_CACHE_SIZE:
+        _latents.popitem(last=False)
+    return latents
+
+
+def download_voice_sample(voice_sample_url: str):
+    """
+    Bytes of a family member's voice sample
+
+    Raises:
+        Exception: if the download fails
+    """
+    with span('http.download', purpose='voice_sample'):
         response = requests.get(voice_sample_url)
-        if response.status_code != 200:
-            raise Exception(f"Failed to download voice sample: {response.status_code}")
-        
-        # Use temp directory for better cleanup
-        temp_voice_path = os.path.join(tempfile.gettempdir(), "temp_voice_sample.wav")
-        temp_output_path = os.path.join(tempfile.gettempdir(), "temp_output.wav")
-        
-        with open(temp_voice_path, "wb") as f:
-            f.write(response.content)
+    if response.status_code != 200:
+        raise Exception(f"Failed to download voice sample: {response.status_code}")
+    return response.content
+
+
+def synthesize_batch(texts: list, voice_bytes: bytes):
+    """
+    generate_audio_batch for an already downloaded voice sample. Holds the
+    model for all of `texts` - callers that must let others in between
+    (bulk imports) pass one text at a time; the speaker conditioning is
+    cached, so that costs little.
+    """
+    try:
+        import torch
         
-        # Generate audio
-        tts.tts_to_file(
-            text=text,
-            speaker_wav=temp_voice_path,
-            language="en",
-            file_path=temp_output_path
-        )
+        model = get_tts().synthesizer.tts_model
+        sample_rate = model.config.audio.output_sample_rate
         
-        # Read generated audio
-        with open(temp_output_path, "rb") as f:
-            audio_bytes = f.read()
+        results = []
+        with _model_lock, torch.inference_mode(), span('tts.synthesize_batch', texts=len(texts), mode=inference_mode):
+            gpt_cond_latent, speaker_embedding = _conditioning_latents(voice_bytes)
+            
+            for text in texts:
+                try:
+                    with span('tts.synthesize', chars=len(text)):
+                        out = model.inference(text, "en", gpt_cond_latent, speaker_embedding, enable_text_splitting=True)
+                    results.append({
+                        "audio": _wav_bytes(out["wav"], sample_rate),
+                        "duration": len(out["wav"]) / sample_rate,
+                        "error": None
+                    })
+                except Exception as e:
+                    print(f"TTS generation error: {e}")
+                    results.append({"audio": None, "duration": 0, "error": str(e)})
         
-        return {"audio": audio_bytes, "error": None}
+        return {"results": results, "error": None}
         
     except Exception as e:
-        print(f"TTS generation error: {e}")
-        return {"audio": None, "error": str(e)}
+        print(f"TTS batch error: {e}")
+        return {"results": [], "error": str(e)}
+
+
+def generate_audio_batch(texts: list, voice_sample_url: str):
+    """
+    Generate TTS audio for several texts in the same cloned voice.
     
-    finally:
-        # Cleanup temp files
-        if temp_voice_path and os.path.exists(temp_voice_path):
-            os.remove(temp_voice_path)
-        if temp_output_path and os.path.exists(temp_output_path):
-            os.remove(temp_output_path)
\ No newline at end of file
+    The voice sample is downloaded once and its speaker conditioning is
+    computed once (and cached), then every text runs through the model
+    back to back. Audio is encoded in memory.
+
+    Returns:
+        {
+            "results": [{"audio": bytes or None, "duration": seconds, "error": None or str}, ...] (same order as texts),
+            "error": None
+        }
+    """
+    try:
+        voice_bytes = download_voice_sample(voice_sample_url)
+    except Exception as e:
+        print(f"TTS batch error: {e}")
+        return {"results": [], "error": str(e)}
+    return synthesize_batch(texts, voice_bytes)
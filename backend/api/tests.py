@@ -0,0 +1,110 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import types
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .services import voice_service
+
+SAMPLE_RATE = 16000
+VOICE_URL = 'https://storage.example/voice-samples/sample.wav'
+
+
+def _wav_for(text):
+    """Waveform the fake model produces for a text - distinct per text"""
+    return np.array([ord(c) / 1000 for c in text], dtype=np.float32)
+
+
+def _samples(audio):
+    with wave.open(io.BytesIO(audio), 'rb') as f:
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+
+class FakeXtts:
+    """Stands in for XTTS: conditioning echoes the sample, inference echoes the text"""
+
+    def __init__(self, in_memory=True):
+        self.in_memory = in_memory
+        self.config = types.SimpleNamespace(audio=types.SimpleNamespace(output_sample_rate=SAMPLE_RATE))
+        self.scratch_paths = []
+
+    def get_conditioning_latents(self, audio_path):
+        source = audio_path[0]
+        if isinstance(source, io.BytesIO):
+            if not self.in_memory:
+                raise RuntimeError('backend only reads paths')
+            data = source.read()
+        else:
+            self.scratch_paths.append(source)
+            with open(source, 'rb') as f:
+                data = f.read()
+        return data, len(data)
+
+    def inference(self, text, language, gpt_cond_latent, speaker_embedding, **kwargs):
+        return {'wav': _wav_for(text)}
+
+
+class GenerateAudioTests(SimpleTestCase):
+    def setUp(self):
+        self.model = FakeXtts()
+        voice_service._latents.clear()
+        self.addCleanup(voice_service._latents.clear)
+
+        fake_tts = types.SimpleNamespace(synthesizer=types.SimpleNamespace(tts_model=self.model))
+        fake_torch = types.SimpleNamespace(inference_mode=contextlib.nullcontext)
+        response = types.SimpleNamespace(status_code=200, content=b'RIFF voice sample')
+        for patcher in (
+            mock.patch.object(voice_service, 'get_tts', return_value=fake_tts),
+            mock.patch.object(voice_service.requests, 'get', return_value=response),
+            mock.patch.dict(sys.modules, {'torch': fake_torch}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def generate_concurrently(self, texts):
+        start = threading.Barrier(len(texts))
+
+        def generate(text):
+            start.wait()
+            return voice_service.generate_audio_from_text(text, VOICE_URL)
+
+        with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+            return list(executor.map(generate, texts))
+
+    def assert_audio_matches(self, texts, results):
+        for text, result in zip(texts, results):
+            self.assertIsNone(result['error'])
+            expected = (np.clip(_wav_for(text), -1.0, 1.0) * 32767).astype(np.int16)
+            np.testing.assert_array_equal(_samples(result['audio']), expected, err_msg=text)
+
+    def test_concurrent_calls_get_their_own_audio(self):
+        texts = [f"Memory number {i} about the lake house" for i in range(32)]
+
+        results = self.generate_concurrently(texts)
+
+        self.assert_audio_matches(texts, results)
+
+    def test_scratch_file_fallback_is_per_call_and_removed(self):
+        self.model.in_memory = False
+        texts = [f"Birthday {i}" for i in range(16)]
+
+        with tempfile.TemporaryDirectory() as scratch_dir, mock.patch.object(tempfile, 'tempdir', scratch_dir):
+            # Each call computes its own conditioning, so each needs a scratch file
+            with mock.patch.object(voice_service, 'LATENTS_CACHE_SIZE', 0):
+                results = self.generate_concurrently(texts)
+
+            self.assertEqual(os.listdir(scratch_dir), [])
+
+        self.assert_audio_matches(texts, results)
+        self.assertEqual(len(self.model.scratch_paths), len(texts))
+        self.assertEqual(len(set(self.model.scratch_paths)), len(texts))
+        for path in self.model.scratch_paths:
+            self.assertEqual(os.path.dirname(path), scratch_dir)
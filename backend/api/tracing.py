@@ -0,0 +1,216 @@
+# backend/api/tracing.py
+
+from contextlib import contextmanager
+from django.conf import settings
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import uuid
+
+logger = logging.getLogger('rememberme.trace')
+
+_trace_id = contextvars.ContextVar('trace_id', default=None)
+_parent_span = contextvars.ContextVar('parent_span', default=None)
+
+_listener = None
+
+
+class JsonSpanFormatter(logging.Formatter):
+    """One JSON object per line, from the span dict attached to the record"""
+
+    def format(self, record):
+        return json.dumps(record.span, default=str)
+
+
+def trace_log_path(pid=None):
+    """This process's trace file: TRACE_LOG_FILE with the pid before the extension"""
+    root, ext = os.path.splitext(settings.TRACE_LOG_FILE)
+    return f"{root}.{pid or os.getpid()}{ext}"
+
+
+def start_trace_logging():
+    """
+    Send span records to this process's trace file without blocking requests:
+    the logger only enqueues; a listener thread does the file I/O.
+
+    Each process writes (and rotates) its own file, so gunicorn workers never
+    rotate a file out from under each other. A forked child (gunicorn with
+    preload_app) restarts logging into its own file.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    os.makedirs(os.path.dirname(settings.TRACE_LOG_FILE), exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        trace_log_path(), maxBytes=settings.TRACE_LOG_MAX_BYTES, backupCount=5, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonSpanFormatter())
+
+    log_queue = queue.SimpleQueue()
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+
+
+def _restart_in_child():
+    # The listener thread didn't survive the fork, and the file is the parent's
+    global _listener
+    if _listener is None:
+        return
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    start_trace_logging()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block as a span of the current trace (nested spans record their parent)
+
+    Usage:
+        with span('gemini.generate_content', model='gemini-2.5-flash'):
+            ...
+    """
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _parent_span.get()
+    token = _parent_span.set(span_id)
+    start = time.perf_counter()
+    record = {
+        'trace_id': _trace_id.get(),
+        'span_id': span_id,
+        'parent_id': parent_id,
+        'name': name,
+        'start': time.time(),
+        'status': 'ok',
+        **attributes,
+    }
+    try:
+        yield record
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+        raise
+    finally:
+        record['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        _parent_span.reset(token)
+        logger.info(name, extra={'span': record})
+
+
+def propagate(fn):
+    """
+    Bind fn to the caller's trace so spans opened in a worker thread
+    (ThreadPoolExecutor.submit) nest under the submitting span.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
+
+
+def propagate_iter(iterable):
+    """
+    Iterate in the caller's trace context - for generators that run after
+    the view returns (StreamingHttpResponse), when the request's context
+    has already been reset.
+    """
+    context = contextvars.copy_context()
+    iterator = iter(iterable)
+
+    def run():
+        try:
+            while True:
+                try:
+                    item = context.run(next, iterator)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            # Closing early (client went away) unwinds spans in the same context
+            close = getattr(iterator, 'close', None)
+            if close:
+                context.run(close)
+    return run()
+
+
+class _TracedQuery:
+    """Wraps a postgrest request builder so execute() runs inside a span"""
+
+    OPERATIONS = {'select', 'insert', 'update', 'upsert', 'delete', 'rpc'}
+
+    def __init__(self, builder, table, operation=None):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def _wrap(self, result, name):
+        if hasattr(result, 'execute'):
+            operation = self._operation or (name if name in self.OPERATIONS else None)
+            return _TracedQuery(result, self._table, operation)
+        return result
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+
+        if name == 'execute':
+            def execute(*args, **kwargs):
+                with span('supabase.execute', table=self._table, operation=self._operation):
+                    return attr(*args, **kwargs)
+            return execute
+
+        if callable(attr):
+            def call(*args, **kwargs):
+                return self._wrap(attr(*args, **kwargs), name)
+            return call
+
+        # Properties such as .not_ return builders too
+        return self._wrap(attr, name)
+
+
+class TracedClient:
+    """Supabase client whose table queries are traced; everything else passes through"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name):
+        return _TracedQuery(self._client.table(name), name)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class TracingMiddleware:
+    """Give every request a trace ID (X-Request-ID if sent) and a root span"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        token = _trace_id.set(trace_id)
+        try:
+            with span('request', method=request.method, path=request.path) as record:
+                response = self.get_response(request)
+                record['status_code'] = response.status_code
+            response['X-Trace-ID'] = trace_id
+            return response
+        finally:
+            _trace_id.reset(token)
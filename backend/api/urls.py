@@ -8,17 +8,30 @@ urlpatterns = [
     
     # Memory creation
     path('create-memory/', views.create_memory, name='create_memory'),
+    path('import-memories/', views.import_memories, name='import_memories'),
+    path('imports/<uuid:import_id>/', views.get_import_progress, name='get_import_progress'),
     
     # Patient query
     path('query/', views.patient_query, name='patient_query'),
+    path('query/stream/', views.patient_query_stream, name='patient_query_stream'),
     
     # Get data
     path('family-members/<uuid:patient_id>/', views.get_family_members, name='get_family_members'),
     path('memories/<uuid:family_member_id>/', views.get_memories, name='get_memories'),
     path('identify-photo/', views.identify_from_photo, name='identify_from_photo'),
+    path('tag-album/', views.tag_album, name='tag_album'),
 
     #videos
     path('upload-video/', views.upload_video, name='upload_video'),
     path('videos/<uuid:patient_id>/', views.get_patient_videos, name='get_patient_videos'),
     path('videos/delete/<uuid:video_id>/', views.delete_video, name='delete_video'),
+
+    # Patient home screen (roster + recent memories + videos)
+    path('home/<uuid:patient_id>/', views.get_patient_home, name='get_patient_home'),
+
+    # Precomputed daily bundle (greeting, today's memories, roster answers)
+    path('today/<uuid:patient_id>/', views.get_today, name='get_today'),
+
+    # Delta sync for offline devices
+    path('sync/<uuid:patient_id>/', views.sync_patient_data, name='sync_patient_data'),
 ]
\ No newline at end of file
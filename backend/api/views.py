@@ -1,12 +1,35 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from django.http import StreamingHttpResponse
+from django.conf import settings
+from django.utils import timezone
+from datetime import date
 from .serializers import *
 from .services.supabase_client import supabase, upload_file, delete_file
 from .services.voice_service import generate_audio_from_text
-from .services.gemini_service import query_patient_memory
+from .services.gemini_service import query_patient_memory, stream_patient_memory
 import uuid
-from .services.image_recognition_service import identify_person_from_photo
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from .services.image_recognition_service import identify_person_from_photo, identify_people_in_photo
+from .conditional import conditional_response
+from .admission import admit, get_limiter, check_rate, HeldSlot, ServiceUnavailable
+from .idempotency import idempotent
+from .tracing import propagate, propagate_iter
+from .fields import parse_fields, select_clause, public_member, PATIENT_MEMBER_FIELDS, PATIENT_MEMORY_SELECT
+from .services.sync_service import fetch_changes
+from .services.daily_bundle_service import build_daily_bundle, get_daily_bundle
+from .services.memory_index_service import index_memory, search_memories, remove_memories
+from .services.speech_service import speak_answer
+from .services.import_service import read_archive, start_import, get_progress as get_import_status
+from .services.image_variant_service import upload_with_variants, add_profile_photo_variants_in_background
+from .services.album_tag_service import tag_album as tag_album_photos
+from .services.photo_cache_service import (
+    compute_image_hash, roster_fingerprint, roster_version,
+    get_cached_identification, cache_identification, invalidate_patient
+)
 
 @api_view(['POST'])
 def register_family_member(request):
@@ -28,6 +51,13 @@ def register_family_member(request):
             'voice_clone_status': 'pending'
         }).execute()
         
+        # New reference photo - previous identifications may be wrong now
+        invalidate_patient(str(data['patient_id']))
+        
+        # Thumbnail/screen copies of the profile photo, off the request path
+        if data.get('profile_photo_url'):
+            add_profile_photo_variants_in_background(result.data[0]['id'], data['profile_photo_url'])
+        
         return Response({
             'family_member_id': result.data[0]['id'],
             'message': 'Family member registered successfully'
@@ -60,6 +90,8 @@ def upload_voice(request):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
+@idempotent
+@admit('tts', rate_key='family_member_id')
 def create_memory(request):
     """Create memory with photos and generate audio"""
     serializer = MemoryCreateSerializer(data=request.data)
@@ -71,7 +103,7 @@ def create_memory(request):
     
     try:
         # Get family member's voice_sample_url
-        member = supabase.table('family_members').select('voice_sample_url, voice_clone_status').eq('id', family_member_id).execute()
+        member = supabase.table('family_members').select('voice_sample_url, voice_clone_status, patient_id').eq('id', family_member_id).execute()
         
         if not member.data or not member.data[0]['voice_sample_url']:
             return Response({'error': 'Voice not uploaded yet'}, status=status.HTTP_400_BAD_REQUEST)
@@ -90,16 +122,23 @@ def create_memory(request):
         
         memory_id = memory_result.data[0]['id']
         
+        # Make the memory searchable for patient questions
+        index_result = index_memory(member.data[0]['patient_id'], memory_result.data[0])
+        if index_result['error']:
+            print(f"Memory {memory_id} not indexed: {index_result['error']}")
+        
         # Upload photos if provided
         if 'photos' in request.FILES:
             for photo in request.FILES.getlist('photos'):
                 path = f"memory-photos/{memory_id}_{uuid.uuid4()}_{photo.name}"
-                result = upload_file('profiles', path, photo.read())
+                result = upload_with_variants('profiles', path, photo.read())
                 
                 if result['url']:
                     supabase.table('memory_photos').insert({
                         'memory_id': memory_id,
-                        'photo_url': result['url']
+                        'photo_url': result['url'],
+                        'thumb_url': result['thumb_url'],
+                        'screen_url': result['screen_url']
                     }).execute()
         
         # Generate audio with Coqui TTS
@@ -131,6 +170,159 @@ def create_memory(request):
 
 
 @api_view(['POST'])
+def import_memories(request):
+    """Bulk import memories (zip archive or list) - returns a progress handle"""
+    try:
+        # 1. Archive upload: manifest.json + photos inside the zip
+        if 'archive' in request.FILES:
+            manifest, files = read_archive(request.FILES['archive'])
+            payload = {'memories': manifest}
+        # 2. List: "memories" (JSON, or a JSON string in multipart) + photo uploads
+        else:
+            memories = request.data.get('memories')
+            if isinstance(memories, str):
+                memories = json.loads(memories)
+            payload = {'memories': memories}
+            if isinstance(memories, list) and len(memories) > settings.IMPORT_MAX_MEMORIES:
+                raise ValueError(f'At most {settings.IMPORT_MAX_MEMORIES} memories per import')
+            if sum(upload.size for upload in request.FILES.values()) > settings.IMPORT_MAX_BYTES:
+                raise ValueError(f'Photos exceed {settings.IMPORT_MAX_BYTES} bytes per import')
+            files = {name: request.FILES[name].read() for name in request.FILES}
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = MemoryImportSerializer(data=payload)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    items = serializer.validated_data['memories']
+    if len(items) > settings.IMPORT_MAX_MEMORIES:
+        return Response({'error': f'At most {settings.IMPORT_MAX_MEMORIES} memories per import'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    missing = [name for item in items for name in item.get('photos', []) if name not in files]
+    if missing:
+        return Response({'error': f'Missing photos: {", ".join(missing)}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        # Check every family member's voice in one query
+        member_ids = sorted({str(item['family_member_id']) for item in items})
+        result = supabase.table('family_members').select('id, patient_id, voice_sample_url, voice_clone_status').in_('id', member_ids).execute()
+        members = {member['id']: member for member in result.data or []}
+        
+        not_ready = [
+            member_id for member_id in member_ids
+            if member_id not in members
+            or not members[member_id]['voice_sample_url']
+            or members[member_id]['voice_clone_status'] != 'ready'
+        ]
+        if not_ready:
+            return Response({'error': f'Voice not ready for family members: {", ".join(not_ready)}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        started = start_import(items, files, members)
+        if started['error']:
+            raise Exception(started['error'])
+        
+        return Response({
+            'import_id': started['import_id'],
+            'memory_ids': started['memory_ids'],
+            'message': 'Import started'
+        }, status=status.HTTP_202_ACCEPTED)
+        
+    except Exception as e:
+        print(f"Memory import error: {e}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def get_import_progress(request, import_id):
+    """Progress of a bulk memory import"""
+    progress = get_import_status(str(import_id))
+    if progress is None:
+        return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(progress, status=status.HTTP_200_OK)
+
+
+def _load_memories(memory_ids):
+    """Memories (with photos) by id, in the given order, in one query"""
+    if not memory_ids:
+        return []
+    
+    result = supabase.table('memories').select(PATIENT_MEMORY_SELECT).in_('id', memory_ids).execute()
+    by_id = {memory['id']: memory for memory in result.data or []}
+    return [by_id[memory_id] for memory_id in memory_ids if memory_id in by_id]
+
+
+def _recent_memories(family_member_id, limit):
+    """A member's latest memories (with photos) in one query"""
+    result = supabase.table('memories').select(PATIENT_MEMORY_SELECT).eq('family_member_id', family_member_id).order('created_at', desc=True).limit(limit).execute()
+    return result.data or []
+
+
+def _patient_recent_memories(patient_id, limit):
+    """A patient's latest memories across all members, in one query"""
+    result = supabase.table('memories').select(
+        f"{PATIENT_MEMORY_SELECT}, family_members!inner (patient_id)"
+    ).eq('family_members.patient_id', patient_id).order('created_at', desc=True).limit(limit).execute()
+    memories = result.data or []
+    for memory in memories:
+        memory.pop('family_members', None)
+    return memories
+
+
+def _member_memories(relevant_memories, family_member_id):
+    """Memories relevant to the question for one member, else their most recent ones"""
+    memories = [m for m in relevant_memories if m['family_member_id'] == family_member_id]
+    return memories or _recent_memories(family_member_id, settings.MEMORY_SEARCH_TOP_K)
+
+
+NO_MEMBERS_ANSWER = {
+    'type': 'error',
+    'answer': 'No family members found. Please ask your family to register first.',
+    'show_memories': False
+}
+
+
+def _query_context(patient_id, query):
+    """
+    What Gemini needs to answer a patient question
+
+    Returns:
+        (family members with voice fields, patient_info or None, memories relevant to the query)
+    """
+    # Get all family members for this patient (plus voice, for spoken answers)
+    members = supabase.table('family_members').select(
+        select_clause(PATIENT_MEMBER_FIELDS, required=('voice_sample_url', 'voice_clone_status'))
+    ).eq('patient_id', patient_id).execute().data or []
+    if not members:
+        return [], None, []
+    
+    # Get patient info (for non-family queries) and the memories most
+    # relevant to the question, concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        patient_info_future = executor.submit(propagate(
+            lambda: supabase.table('patient_info').select('*').eq('patient_id', patient_id).execute()
+        ))
+        search_future = executor.submit(propagate(search_memories), patient_id, query)
+        
+        patient_info_result = patient_info_future.result()
+        search_result = search_future.result()
+    
+    patient_info = patient_info_result.data[0] if patient_info_result.data else None
+    if not search_result['indexed']:
+        # Index is being built in the background - recent memories meanwhile
+        return members, patient_info, _patient_recent_memories(patient_id, settings.MEMORY_SEARCH_TOP_K)
+    
+    memory_ids = [hit['memory_id'] for hit in search_result['results']]
+    relevant_memories = _load_memories(memory_ids)
+    if len(relevant_memories) < len(memory_ids):
+        # Hits for memories deleted since they were indexed
+        found = {memory['id'] for memory in relevant_memories}
+        remove_memories(patient_id, [memory_id for memory_id in memory_ids if memory_id not in found])
+    return members, patient_info, relevant_memories
+
+
+@api_view(['POST'])
+@admit('gemini', rate_key='patient_id')
 def patient_query(request):
     """Patient asks question - Gemini handles versatile queries"""
     serializer = PatientQuerySerializer(data=request.data)
@@ -142,22 +334,14 @@ def patient_query(request):
     query = data['query']
     
     try:
-        # Get all family members for this patient
-        members = supabase.table('family_members').select('*').eq('patient_id', patient_id).execute()
-        
-        if not members.data:
-            return Response({
-                'type': 'error',
-                'answer': 'No family members found. Please ask your family to register first.',
-                'show_memories': False
-            }, status=status.HTTP_200_OK)
+        members, patient_info, relevant_memories = _query_context(patient_id, query)
+        members_by_id = {member['id']: member for member in members}
         
-        # Get patient info (for non-family queries)
-        patient_info_result = supabase.table('patient_info').select('*').eq('patient_id', patient_id).execute()
-        patient_info = patient_info_result.data[0] if patient_info_result.data else None
+        if not members:
+            return Response(NO_MEMBERS_ANSWER, status=status.HTTP_200_OK)
         
         # Query Gemini with structured data
-        gemini_result = query_patient_memory(query, members.data, patient_info)
+        gemini_result = query_patient_memory(query, members, patient_info, relevant_memories)
         
         if gemini_result.get('error') and gemini_result['type'] == 'error':
             return Response({
@@ -179,47 +363,47 @@ def patient_query(request):
                     'show_memories': False
                 }, status=status.HTTP_200_OK)
             
-            # Get family member details
-            member_result = supabase.table('family_members').select('*').eq('id', family_member_id).execute()
+            # Family member details (already loaded with the roster)
+            member = members_by_id.get(family_member_id)
             
-            if not member_result.data:
+            if not member:
                 return Response({
                     'type': 'error',
                     'answer': 'Family member not found',
                     'show_memories': False
                 }, status=status.HTTP_200_OK)
             
-            member = member_result.data[0]
-            
-            # Get all memories for this family member (only if show_memories=true)
+            # Memories relevant to the question (only if show_memories=true),
+            # falling back to the member's most recent ones
             memories = []
             if gemini_result.get('show_memories', False):
-                memories_result = supabase.table('memories').select('*').eq('family_member_id', family_member_id).order('created_at', desc=True).execute()
-                
-                # Get photos for each memory
-                memories = memories_result.data or []
-                for memory in memories:
-                    photos_result = supabase.table('memory_photos').select('*').eq('memory_id', memory['id']).execute()
-                    memory['photos'] = photos_result.data or []
+                memories = _member_memories(relevant_memories, family_member_id)
+            
+            # Answer spoken in the family member's own voice - skipped (text
+            # only) rather than queued when TTS is saturated
+            audio_url = None
+            if data['speak'] and member.get('voice_sample_url') and member.get('voice_clone_status') == 'ready':
+                tts_limiter = get_limiter('tts')
+                if tts_limiter.acquire(timeout=0):
+                    try:
+                        audio_url = speak_answer(gemini_result['answer'], member['voice_sample_url'])['audio_url']
+                    finally:
+                        tts_limiter.release()
             
             return Response({
                 'type': 'family_member',
                 'answer': gemini_result['answer'],
-                'family_member': member,
+                'audio_url': audio_url,
+                'family_member': public_member(member),
                 'memories': memories,
                 'show_memories': gemini_result.get('show_memories', False)
             }, status=status.HTTP_200_OK)
         
         # 2. COUNT QUERY
         elif gemini_result['type'] == 'count':
-            # Get full details of counted members
+            # Details of counted members (already loaded with the roster)
             member_ids = gemini_result.get('family_members', [])
-            counted_members = []
-            
-            for member_id in member_ids:
-                member_result = supabase.table('family_members').select('*').eq('id', member_id).execute()
-                if member_result.data:
-                    counted_members.append(member_result.data[0])
+            counted_members = [public_member(members_by_id[member_id]) for member_id in member_ids if member_id in members_by_id]
             
             return Response({
                 'type': 'count',
@@ -234,7 +418,7 @@ def patient_query(request):
             return Response({
                 'type': 'list_all',
                 'answer': gemini_result['answer'],
-                'family_members': members.data,
+                'family_members': [public_member(member) for member in members],
                 'show_memories': False
             }, status=status.HTTP_200_OK)
         
@@ -274,43 +458,252 @@ def patient_query(request):
             'show_memories': False,
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _sse(event, data):
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _stream_answer(query, members, patient_info, relevant_memories):
+    """
+    SSE events for patient_query_stream:
+        meta     - type, member card / counted members / patient info, as soon as Gemini decides
+        answer   - {"text": ...} pieces of the answer while it is generated
+        memories - the member's memories, once loaded (fetched while the answer streams)
+        done     - {"answer": full text}
+        error    - {"type": "error", "answer": ...}; ends the stream
+    """
+    if not members:
+        yield _sse('meta', NO_MEMBERS_ANSWER)
+        yield _sse('done', {'answer': NO_MEMBERS_ANSWER['answer']})
+        return
     
+    members_by_id = {member['id']: member for member in members}
+    events = stream_patient_memory(query, members, patient_info, relevant_memories)
+    executor = ThreadPoolExecutor(max_workers=1)
+    memories_future = None
+    answer_parts = []
+    try:
+        for kind, payload in events:
+            if kind == 'error':
+                yield _sse('error', {'type': 'error', 'answer': payload['answer'], 'show_memories': False})
+                return
+            
+            if kind == 'meta':
+                response_type = payload.get('type', 'unclear')
+                meta = {'type': response_type, 'show_memories': bool(payload.get('show_memories'))}
+                
+                if response_type == 'family_member':
+                    member = members_by_id.get(payload.get('family_member_id'))
+                    if not member:
+                        yield _sse('error', {'type': 'error', 'answer': 'Could not identify the family member', 'show_memories': False})
+                        return
+                    meta['family_member'] = public_member(member)
+                    if meta['show_memories']:
+                        # Load memories while the answer text streams
+                        memories_future = executor.submit(propagate(_member_memories), relevant_memories, member['id'])
+                elif response_type in ('count', 'list_all'):
+                    member_ids = payload.get('family_members', []) if response_type == 'count' else list(members_by_id)
+                    meta['family_members'] = [public_member(members_by_id[member_id]) for member_id in member_ids if member_id in members_by_id]
+                    if response_type == 'count':
+                        meta['count'] = payload.get('count', len(meta['family_members']))
+                elif response_type == 'patient_info':
+                    meta['info_type'] = payload.get('info_type')
+                    meta['patient_info'] = patient_info
+                
+                yield _sse('meta', meta)
+                continue
+            
+            answer_parts.append(payload)
+            yield _sse('answer', {'text': payload})
+            if memories_future and memories_future.done():
+                yield _sse('memories', {'memories': memories_future.result()})
+                memories_future = None
+        
+        if memories_future:
+            yield _sse('memories', {'memories': memories_future.result()})
+        yield _sse('done', {'answer': ''.join(answer_parts)})
+    finally:
+        events.close()
+        executor.shutdown(wait=False)
+
+
+@api_view(['POST'])
+def patient_query_stream(request):
+    """
+    patient_query as server-sent events (text/event-stream): the response
+    type and member card arrive first, then the answer text as Gemini writes
+    it, then the memories. See _stream_answer for the events.
+    """
+    serializer = PatientQuerySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    patient_id = str(data['patient_id'])
+    
+    # Same admission as patient_query, but the Gemini slot is held until
+    # the stream ends rather than until this function returns
+    check_rate(f"patient_id:{patient_id}")
+    limiter = get_limiter('gemini')
+    if not limiter.acquire():
+        raise ServiceUnavailable(wait=math.ceil(limiter.timeout))
+    
+    try:
+        members, patient_info, relevant_memories = _query_context(patient_id, data['query'])
+    except Exception as e:
+        limiter.release()
+        print(f"Patient query error: {e}")
+        return Response({
+            'type': 'error',
+            'answer': 'Something went wrong. Please try again.',
+            'show_memories': False,
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    events = propagate_iter(_stream_answer(data['query'], members, patient_info, relevant_memories))
+    response = StreamingHttpResponse(HeldSlot(limiter, events), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['GET'])
 def get_family_members(request, patient_id):
-    """Get all family members for a patient"""
+    """Get all family members for a patient (?fields= to pick columns)"""
+    try:
+        columns, _ = parse_fields(request, 'family_members')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
     try:
-        result = supabase.table('family_members').select('*').eq('patient_id', str(patient_id)).execute()
-        return Response(result.data, status=status.HTTP_200_OK)
+        # The roster is small - its rows double as the version
+        select = select_clause(columns)
+        result = supabase.table('family_members').select(select).eq('patient_id', str(patient_id)).order('created_at').order('id').execute()
+        return conditional_response(request, result.data, lambda: result.data, representation=select)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
 def get_memories(request, family_member_id):
-    """Get all memories for a family member with photos"""
+    """Get all memories for a family member with photos (?fields= to pick columns)"""
+    family_member_id = str(family_member_id)
+    
     try:
-        # Get memories
-        memories = supabase.table('memories').select('*').eq('family_member_id', str(family_member_id)).execute()
-        
-        # Get photos for each memory
-        for memory in memories.data:
-            photos = supabase.table('memory_photos').select('*').eq('memory_id', memory['id']).execute()
-            memory['photos'] = photos.data
-        
-        return Response(memories.data, status=status.HTTP_200_OK)
+        columns, embeds = parse_fields(request, 'memories', embeds=('photos',))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    select = select_clause(columns)
+    if 'photos' in embeds:
+        select += ', photos:memory_photos (*)'
+    
+    def build_memories():
+        # Memories and their photos in one query
+        memories = supabase.table('memories').select(select).eq('family_member_id', family_member_id).execute()
+        return memories.data
+    
+    try:
+        # Cheap version check first - skip the photo queries when unchanged
+        versions = supabase.table('memories').select('id, updated_at, memory_photos (id, updated_at)').eq('family_member_id', family_member_id).order('id').order('id', foreign_table='memory_photos').execute()
+        return conditional_response(request, versions.data, build_memories, representation=select)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
+GROUP_MEMORIES_PER_PERSON = 10
+
+
+def _describe_people(people):
+    """Names for an answer, e.g. your daughter Sarah, your son Mike and your wife Maria"""
+    names = [f"your {member['relationship']} {member['name']}" for member in people]
+    return names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+
+
+def _group_memories(member_ids):
+    """Each member's newest memories (capped per person), in one query"""
+    # Order and limit apply per member inside the embed
+    rows = supabase.table('family_members').select(f"id, memories ({PATIENT_MEMORY_SELECT})").in_('id', member_ids).order(
+        'created_at', desc=True, foreign_table='memories'
+    ).limit(GROUP_MEMORIES_PER_PERSON, foreign_table='memories').execute().data or []
+    by_member = {row['id']: row['memories'] or [] for row in rows}
+    return [memory for member_id in member_ids for memory in by_member.get(member_id, [])]
+
+
+def _identify_group(patient_id, image_bytes, image_hash, fingerprint, version, members):
+    """identify_from_photo with mode=group - every face, one Gemini call"""
+    result = get_cached_identification(patient_id, image_hash, fingerprint, version, mode='group')
+    if result is None:
+        result = identify_people_in_photo(image_bytes, members)
+        # No usable reference photos may be a passing download failure - don't remember it
+        if not result.get('no_references'):
+            cache_identification(patient_id, image_hash, fingerprint, version, result, mode='group')
+    
+    if result.get('no_references'):
+        return Response({
+            'match': 'unknown',
+            'mode': 'group',
+            'answer': 'I don\'t have photos of your family to compare with yet. Please ask your family to add their photos.',
+            'confidence': 'none',
+            'faces': [],
+            'family_members': [],
+            'memories': [],
+            'show_memories': False
+        }, status=status.HTTP_200_OK)
+    
+    if result['error']:
+        return Response({
+            'match': 'error',
+            'mode': 'group',
+            'answer': 'Sorry, I had trouble processing that image. Please try again.',
+            'confidence': 'none',
+            'faces': []
+        }, status=status.HTTP_200_OK)
+    
+    faces = result['faces']
+    members_by_id = {member['id']: member for member in members}
+    recognized = [members_by_id[face['family_member_id']] for face in faces if face['family_member_id'] in members_by_id]
+    
+    # Memories of everyone recognized, newest first per person
+    memories = _group_memories([member['id'] for member in recognized]) if recognized else []
+    
+    unknown = len(faces) - len(recognized)
+    if not faces:
+        answer = 'I couldn\'t find anyone\'s face in this photo. Could you try another one?'
+    elif not recognized:
+        answer = 'I couldn\'t identify the people in this photo from your family photos. Could you tell me who they are?'
+    else:
+        answer = f"I can see {_describe_people(recognized)}!"
+        if unknown:
+            answer += f" There {'is' if unknown == 1 else 'are'} also {unknown} {'person' if unknown == 1 else 'people'} I don't recognize."
+    
+    return Response({
+        'match': 'found' if recognized else 'unknown',
+        'mode': 'group',
+        'answer': answer,
+        'faces': faces,
+        'family_members': [public_member(member) for member in recognized],
+        'memories': memories,
+        'show_memories': bool(memories)
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
+@admit('gemini_vision', rate_key='patient_id')
 def identify_from_photo(request):
     """Patient uploads photo - AI identifies who it is"""
     
     patient_id = request.data.get('patient_id')
+    mode = request.data.get('mode') or 'single'
     
     if not patient_id:
         return Response({'error': 'Missing patient_id'}, status=status.HTTP_400_BAD_REQUEST)
     
+    if mode not in ('single', 'group'):
+        return Response({'error': 'mode must be "single" or "group"'}, status=status.HTTP_400_BAD_REQUEST)
+    
     # Check if image file was uploaded
     if 'image' not in request.FILES:
         return Response({'error': 'No image uploaded'}, status=status.HTTP_400_BAD_REQUEST)
@@ -320,6 +713,9 @@ def identify_from_photo(request):
         image_file = request.FILES['image']
         image_bytes = image_file.read()
         
+        # Read before the roster so a concurrent roster edit voids our cache write
+        version = roster_version(str(patient_id))
+        
         # Get all family members for this patient
         members = supabase.table('family_members').select('*').eq('patient_id', str(patient_id)).execute()
         
@@ -330,8 +726,19 @@ def identify_from_photo(request):
                 'confidence': 'none'
             }, status=status.HTTP_200_OK)
         
-        # Call image recognition service
-        result = identify_person_from_photo(image_bytes, members.data)
+        # Reuse a previous identification of the same (or near-identical) photo
+        image_hash = compute_image_hash(image_bytes)
+        fingerprint = roster_fingerprint(members.data)
+        
+        if mode == 'group':
+            return _identify_group(patient_id, image_bytes, image_hash, fingerprint, version, members.data)
+        
+        result = get_cached_identification(patient_id, image_hash, fingerprint, version)
+        
+        if result is None:
+            # Call image recognition service
+            result = identify_person_from_photo(image_bytes, members.data)
+            cache_identification(patient_id, image_hash, fingerprint, version, result)
         
         if result.get('error') and result['match'] == 'error':
             return Response({
@@ -344,25 +751,19 @@ def identify_from_photo(request):
         if result['match'] == 'found':
             family_member_id = result['family_member_id']
             
-            # Get family member details
-            member_result = supabase.table('family_members').select('*').eq('id', family_member_id).execute()
+            # Family member details (already loaded with the roster)
+            member = next((m for m in members.data if m['id'] == family_member_id), None)
             
-            if not member_result.data:
+            if not member:
                 return Response({
                     'match': 'unknown',
                     'answer': 'I recognized someone but couldn\'t find their details.',
                     'confidence': 'none'
                 }, status=status.HTTP_200_OK)
             
-            member = member_result.data[0]
-            
-            # Get memories for this person
-            memories_result = supabase.table('memories').select('*').eq('family_member_id', family_member_id).order('created_at', desc=True).execute()
-            
+            # Memories for this person, with their photos, in one query
+            memories_result = supabase.table('memories').select('*, photos:memory_photos (*)').eq('family_member_id', family_member_id).order('created_at', desc=True).execute()
             memories = memories_result.data or []
-            for memory in memories:
-                photos_result = supabase.table('memory_photos').select('*').eq('memory_id', memory['id']).execute()
-                memory['photos'] = photos_result.data or []
             
             # Build answer
             confidence_text = ""
@@ -403,6 +804,47 @@ def identify_from_photo(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 @api_view(['POST'])
+def tag_album(request):
+    """
+    Tag a whole album with the family members in each photo.
+    Streams one JSON line per photo as it finishes (application/x-ndjson),
+    then a {"done": true, ...} summary line.
+    """
+    patient_id = request.data.get('patient_id')
+    uploads = request.FILES.getlist('photos')
+    
+    if not patient_id:
+        return Response({'error': 'Missing patient_id'}, status=status.HTTP_400_BAD_REQUEST)
+    if not uploads:
+        return Response({'error': 'No photos uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(uploads) > settings.ALBUM_MAX_PHOTOS:
+        return Response({'error': f'At most {settings.ALBUM_MAX_PHOTOS} photos per album'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    check_rate(f"patient_id:{patient_id}")
+    
+    try:
+        # Roster (and, inside, the reference photos) loaded once for the album
+        version = roster_version(str(patient_id))
+        members = supabase.table('family_members').select('*').eq('patient_id', str(patient_id)).execute()
+        if not members.data:
+            return Response({'error': 'No family members registered yet'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = tag_album_photos(str(patient_id), uploads, members.data, version)
+    except Exception as e:
+        print(f"Album tagging error: {e}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    response = StreamingHttpResponse(
+        (json.dumps(result, default=str) + "\n" for result in results),
+        content_type='application/x-ndjson'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let a proxy hold lines back
+    return response
+
+
+@api_view(['POST'])
+@idempotent
 def upload_video(request):
     """Upload family video with thumbnail"""
     serializer = VideoUploadSerializer(data=request.data)
@@ -469,22 +911,41 @@ def upload_video(request):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+VIDEO_MEMBER_EMBED = '''
+    family_members (
+        id,
+        name,
+        relationship,
+        profile_photo_url,
+        profile_photo_thumb_url
+    )
+'''
+VIDEO_FEED_SELECT = '*,' + VIDEO_MEMBER_EMBED
+
+
 @api_view(['GET'])
 def get_patient_videos(request, patient_id):
-    """Get all videos for a patient (feed view)"""
+    """Get all videos for a patient (feed view, ?fields= to pick columns)"""
+    patient_id = str(patient_id)
+    
     try:
+        columns, embeds = parse_fields(request, 'family_videos', embeds=('family_members',))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    select = select_clause(columns)
+    if 'family_members' in embeds:
+        select += ',' + VIDEO_MEMBER_EMBED
+    
+    def build_videos():
         # Fetch videos with family member info
-        videos = supabase.table('family_videos').select('''
-            *,
-            family_members (
-                id,
-                name,
-                relationship,
-                profile_photo_url
-            )
-        ''').eq('patient_id', str(patient_id)).order('created_at', desc=True).execute()
-        
-        return Response(videos.data, status=status.HTTP_200_OK)
+        videos = supabase.table('family_videos').select(select).eq('patient_id', patient_id).order('created_at', desc=True).execute()
+        return videos.data
+    
+    try:
+        # Cheap version check first (uploader name/photo changes count too)
+        versions = supabase.table('family_videos').select('id, updated_at, family_members (updated_at)').eq('patient_id', patient_id).order('id').execute()
+        return conditional_response(request, versions.data, build_videos, representation=select)
         
     except Exception as e:
         print(f"Get videos error: {e}")
@@ -518,4 +979,110 @@ def delete_video(request, video_id):
         
     except Exception as e:
         print(f"Delete video error: {e}")
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+HOME_MEMORIES_LIMIT = 20
+HOME_VIDEOS_LIMIT = 10
+HOME_MAX_LIMIT = 100
+
+
+def _limit_param(request, name, default):
+    """Read a positive integer limit from the query string"""
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(value, HOME_MAX_LIMIT))
+
+
+@api_view(['GET'])
+def get_patient_home(request, patient_id):
+    """Patient first screen - roster, recent memories and videos in one call"""
+    patient_id = str(patient_id)
+    memories_limit = _limit_param(request, 'memories_limit', HOME_MEMORIES_LIMIT)
+    videos_limit = _limit_param(request, 'videos_limit', HOME_VIDEOS_LIMIT)
+    
+    def fetch_members():
+        # Same patient-safe columns as the query answers (no email, voice sample, ...)
+        return supabase.table('family_members').select(select_clause(PATIENT_MEMBER_FIELDS)).eq('patient_id', patient_id).execute()
+    
+    def fetch_memories():
+        # Photos and the patient filter are embedded, so this is a single query
+        return supabase.table('memories').select('''
+            *,
+            photos:memory_photos (*),
+            family_members!inner (
+                id,
+                name,
+                relationship,
+                profile_photo_url,
+                profile_photo_thumb_url,
+                patient_id
+            )
+        ''').eq('family_members.patient_id', patient_id).order('created_at', desc=True).limit(memories_limit).execute()
+    
+    def fetch_videos():
+        return supabase.table('family_videos').select(VIDEO_FEED_SELECT).eq('patient_id', patient_id).order('created_at', desc=True).limit(videos_limit).execute()
+    
+    try:
+        # The three queries are independent - run them concurrently
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            members_future = executor.submit(propagate(fetch_members))
+            memories_future = executor.submit(propagate(fetch_memories))
+            videos_future = executor.submit(propagate(fetch_videos))
+            
+            members = members_future.result().data or []
+            memories = memories_future.result().data or []
+            videos = videos_future.result().data or []
+        
+        return Response({
+            'family_members': members,
+            'recent_memories': memories,
+            'videos': videos
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        print(f"Patient home error: {e}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def get_today(request, patient_id):
+    """Patient's precomputed daily bundle (?date=YYYY-MM-DD for the device's local day)"""
+    patient_id = str(patient_id)
+    try:
+        day = date.fromisoformat(request.query_params['date']) if request.query_params.get('date') else timezone.localdate()
+    except ValueError:
+        return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        stored = get_daily_bundle(patient_id, day)
+        if stored is None:
+            # Nightly job hasn't covered this patient/day - build it now,
+            # with the template greeting so first open doesn't wait on Gemini
+            stored = build_daily_bundle(patient_id, day, use_gemini=False)
+            if stored['error']:
+                return Response({'error': stored['error']}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        version = [{'id': f"{patient_id}:{day.isoformat()}", 'updated_at': stored['created_at']}]
+        return conditional_response(request, version, lambda: stored['bundle'], collection=False)
+    except Exception as e:
+        print(f"Daily bundle error: {e}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def sync_patient_data(request, patient_id):
+    """Delta sync - rows changed or deleted since the device's cursor"""
+    cursor = request.query_params.get('cursor') or None
+    
+    try:
+        result = fetch_changes(str(patient_id), cursor)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if result['error']:
+        return Response({'error': result['error']}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    result.pop('error')
+    return Response(result, status=status.HTTP_200_OK)
@@ -0,0 +1,50 @@
+# backend/api/warmup.py
+
+import threading
+import time
+
+
+def _warm_tts():
+    from .services.voice_service import get_tts
+    get_tts()
+
+
+def _warm_gemini():
+    from .services.gemini_service import get_model
+    get_model()
+
+
+def _warm_pil():
+    from PIL import Image, ImageOps  # noqa: F401
+
+
+WARMERS = {
+    'tts': _warm_tts,
+    'gemini': _warm_gemini,
+    'pil': _warm_pil,
+}
+
+
+def warm_up(services):
+    """
+    Load heavy services now instead of on the first request that needs them.
+    Call from worker start-up (e.g. a gunicorn post_fork hook) for the
+    workers that synthesize audio or talk to Gemini.
+
+    Args:
+        services: Iterable of names from WARMERS ('tts', 'gemini', 'pil')
+    """
+    for name in services:
+        start = time.perf_counter()
+        try:
+            WARMERS[name]()
+            print(f"Warmed up {name} in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+
+
+def warm_up_in_background(services):
+    """warm_up on a daemon thread, so start-up isn't blocked"""
+    thread = threading.Thread(target=warm_up, args=(list(services),), name='warm-up', daemon=True)
+    thread.start()
+    return thread
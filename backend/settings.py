@@ -1,5 +1,6 @@
 from pathlib import Path
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 import os
 
 load_dotenv()
@@ -26,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.api.tracing.TracingMiddleware',
+    'backend.api.profiling.SamplingProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -70,15 +73,152 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # CORS
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Retry-After', 'X-Trace-ID', 'Idempotent-Replayed']
 
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'backend.api.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
-}
\ No newline at end of file
+}
+
+# Cache (shared across workers when REDIS_URL is set). Spoken-answer audio
+# (large, long-lived) has its own 'speech' cache so it never evicts or
+# crowds out the small coordination keys in 'default' (idempotency claims,
+# the import lock, rate limits, photo-ID versions). SPEECH_REDIS_URL can
+# point it at a separate Redis (e.g. with an allkeys-lru policy).
+REDIS_URL = os.getenv('REDIS_URL')
+SPEECH_REDIS_URL = os.getenv('SPEECH_REDIS_URL', REDIS_URL)
+SPEECH_CACHE_MAX_ENTRIES = int(os.getenv('SPEECH_CACHE_MAX_ENTRIES', 500))  # local-memory fallback only
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'speech': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': SPEECH_REDIS_URL,
+            'KEY_PREFIX': 'speech',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'speech': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'speech',
+            'OPTIONS': {'MAX_ENTRIES': SPEECH_CACHE_MAX_ENTRIES},
+        },
+    }
+
+# Photo identification cache
+PHOTO_ID_CACHE_TTL = int(os.getenv('PHOTO_ID_CACHE_TTL', 7 * 24 * 3600))
+PHOTO_ID_CACHE_MAX_ENTRIES = int(os.getenv('PHOTO_ID_CACHE_MAX_ENTRIES', 200))
+PHOTO_ID_HASH_TOLERANCE = int(os.getenv('PHOTO_ID_HASH_TOLERANCE', 6))  # bits out of 64
+
+# Idempotency-Key on create endpoints: results kept for IDEMPOTENCY_TTL;
+# a retry of a still-running request gets 409 with Retry-After
+# IDEMPOTENCY_RETRY_AFTER seconds. IDEMPOTENCY_LOCK_TTL must outlast the
+# slowest request (TTS).
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 24 * 3600))
+IDEMPOTENCY_RETRY_AFTER = int(os.getenv('IDEMPOTENCY_RETRY_AFTER', 2))
+IDEMPOTENCY_LOCK_TTL = int(os.getenv('IDEMPOTENCY_LOCK_TTL', 15 * 60))
+
+# Read endpoints (ETag / Last-Modified). 0 = always revalidate.
+API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', 0))
+
+# Semantic memory search
+MEMORY_INDEX_DIR = os.getenv('MEMORY_INDEX_DIR', str(BASE_DIR / 'data' / 'memory_index'))
+MEMORY_EMBEDDING_MODEL = os.getenv('MEMORY_EMBEDDING_MODEL', 'models/text-embedding-004')
+MEMORY_SEARCH_TOP_K = int(os.getenv('MEMORY_SEARCH_TOP_K', 5))
+MEMORY_SEARCH_MIN_SCORE = float(os.getenv('MEMORY_SEARCH_MIN_SCORE', 0.3))
+MEMORY_INDEX_RETRY_SECONDS = int(os.getenv('MEMORY_INDEX_RETRY_SECONDS', 300))  # after a failed build
+
+# Bulk memory import
+IMPORT_MAX_MEMORIES = int(os.getenv('IMPORT_MAX_MEMORIES', 200))
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', 200 * 1024 * 1024))  # photos + manifest per import
+IMPORT_UPLOAD_WORKERS = int(os.getenv('IMPORT_UPLOAD_WORKERS', 8))
+IMPORT_TTS_BATCH_SIZE = int(os.getenv('IMPORT_TTS_BATCH_SIZE', 8))
+# Jobs are tracked in memory_imports; one whose worker hasn't reported for
+# IMPORT_STALE_SECONDS (restart, crash) is marked failed. Also the lifetime
+# of the cross-worker lock that keeps imports one at a time.
+IMPORT_STALE_SECONDS = int(os.getenv('IMPORT_STALE_SECONDS', 30 * 60))
+
+# Photo variants generated on upload (longest edge in px; originals are kept as uploaded)
+IMAGE_VARIANT_SIZES = {
+    'thumb': int(os.getenv('IMAGE_THUMB_SIZE', 320)),
+    'screen': int(os.getenv('IMAGE_SCREEN_SIZE', 1600)),
+}
+IMAGE_VARIANT_FORMAT = os.getenv('IMAGE_VARIANT_FORMAT', 'WEBP')
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', 80))
+
+# Batch album tagging
+ALBUM_MAX_PHOTOS = int(os.getenv('ALBUM_MAX_PHOTOS', 100))
+ALBUM_TAG_WORKERS = int(os.getenv('ALBUM_TAG_WORKERS', 4))
+
+# Daily bundle (precomputed by `manage.py build_daily_bundles`, e.g. nightly from cron)
+DAILY_BUNDLE_MEMORIES = int(os.getenv('DAILY_BUNDLE_MEMORIES', 5))
+DAILY_BUNDLE_WORKERS = int(os.getenv('DAILY_BUNDLE_WORKERS', 4))
+
+# TTS CPU tuning (0 / empty = torch defaults)
+TTS_INTRA_OP_THREADS = int(os.getenv('TTS_INTRA_OP_THREADS', 0))
+TTS_INTER_OP_THREADS = int(os.getenv('TTS_INTER_OP_THREADS', 0))
+TTS_CPU_AFFINITY = os.getenv('TTS_CPU_AFFINITY', '')  # e.g. "0-3"
+TTS_INFERENCE_MODE = os.getenv('TTS_INFERENCE_MODE', 'fp32')  # fp32 | int8 (dynamic quantization)
+
+# Spoken answers (answer/sentence audio cache)
+SPEECH_CACHE_TTL = int(os.getenv('SPEECH_CACHE_TTL', 30 * 24 * 3600))
+
+# Admission control. Concurrency/queue limits are per worker process;
+# timeout is the longest a request waits for a slot before a 503.
+ADMISSION_LIMITS = {
+    'gemini': {
+        'concurrency': int(os.getenv('GEMINI_CONCURRENCY', 8)),
+        'queue': int(os.getenv('GEMINI_QUEUE', 16)),
+        'timeout': float(os.getenv('GEMINI_QUEUE_TIMEOUT', 5)),
+    },
+    'gemini_vision': {
+        'concurrency': int(os.getenv('GEMINI_VISION_CONCURRENCY', 4)),
+        'queue': int(os.getenv('GEMINI_VISION_QUEUE', 8)),
+        'timeout': float(os.getenv('GEMINI_VISION_QUEUE_TIMEOUT', 5)),
+    },
+    'tts': {
+        'concurrency': int(os.getenv('TTS_CONCURRENCY', 1)),
+        'queue': int(os.getenv('TTS_QUEUE', 4)),
+        'timeout': float(os.getenv('TTS_QUEUE_TIMEOUT', 10)),
+    },
+}
+
+# Per-patient (or per-family-member for writes) request rate, shared via CACHES
+PATIENT_RATE_LIMIT = {
+    'requests': int(os.getenv('PATIENT_RATE_LIMIT', 30)),
+    'window': int(os.getenv('PATIENT_RATE_WINDOW', 60)),  # seconds
+}
+
+# Request tracing (structured JSON spans, one per line). Each process
+# writes its own file, e.g. logs/trace.<pid>.jsonl
+TRACE_LOG_FILE = os.getenv('TRACE_LOG_FILE', str(BASE_DIR / 'logs' / 'trace.jsonl'))
+TRACE_LOG_MAX_BYTES = int(os.getenv('TRACE_LOG_MAX_BYTES', 50 * 1024 * 1024))
+
+# Sampling profiler (off unless PROFILER_ENABLED=1)
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes')
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0.01))  # fraction of requests
+PROFILER_SLOW_THRESHOLD_MS = float(os.getenv('PROFILER_SLOW_THRESHOLD_MS', 0))  # 0 = off
+PROFILER_INTERVAL_MS = float(os.getenv('PROFILER_INTERVAL_MS', 5))
+PROFILER_OUTPUT_DIR = os.getenv('PROFILER_OUTPUT_DIR', str(BASE_DIR / 'logs' / 'profiles'))
+PROFILER_MAX_PROFILES = int(os.getenv('PROFILER_MAX_PROFILES', 200))  # kept per endpoint, oldest pruned
+
+# Start-up: heavy services (TTS model, Gemini SDK, PIL) load on first use.
+# WARMUP_SERVICES=tts,gemini preloads them in the background for workers
+# that need them. STARTUP_BUDGET_MS is enforced by `manage.py check_startup`.
+WARMUP_SERVICES = [name.strip() for name in os.getenv('WARMUP_SERVICES', '').split(',') if name.strip()]
+STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', 3000))
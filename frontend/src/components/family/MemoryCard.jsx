@@ -14,7 +14,7 @@ const MemoryCard = ({ memory, onEdit, onDelete }) => {
 
   // Get first photo as thumbnail or show placeholder
   const thumbnailUrl = memory.photos && memory.photos.length > 0 
-    ? memory.photos[0].photo_url 
+    ? memory.photos[0].screen_url || memory.photos[0].photo_url
     : null;
 
   return (
@@ -1,6 +1,7 @@
 // src/components/family/MemoryForm.jsx
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { X, Upload, Loader2, Trash2, AlertCircle, Volume2 } from 'lucide-react';
+import { postIdempotent } from '../../lib/idempotentPost';
 
 const API_BASE = 'http://127.0.0.1:8000/api';
 
@@ -10,6 +11,8 @@ const MemoryForm = ({ isOpen, onClose, familyMemberId, editingMemory, onSuccess
   const [photos, setPhotos] = useState([]);
   const [uploading, setUploading] = useState(false);
   const [error, setError] = useState('');
+  // Kept across a retry after a network failure, so the server doesn't redo the work
+  const idempotencyKey = useRef(null);
   const [statusMessage, setStatusMessage] = useState('');
 
   useEffect(() => {
@@ -69,10 +72,12 @@ const MemoryForm = ({ isOpen, onClose, familyMemberId, editingMemory, onSuccess
 
       setStatusMessage('Uploading photos and generating audio...');
 
-      const response = await fetch(`${API_BASE}/create-memory/`, {
-        method: 'POST',
-        body: formData,
-      });
+      if (!idempotencyKey.current) {
+        idempotencyKey.current = crypto.randomUUID();
+      }
+      const response = await postIdempotent(`${API_BASE}/create-memory/`, idempotencyKey.current, formData);
+      // The server answered - the next submit is a new request
+      idempotencyKey.current = null;
 
       const data = await response.json();
 
@@ -1,5 +1,6 @@
-import React, { useState } from 'react';
+import React, { useState, useRef } from 'react';
 import { X, Upload, Loader2, Video, AlertCircle, Image } from 'lucide-react';
+import { postIdempotent } from '../../lib/idempotentPost';
 
 const API_BASE = 'http://127.0.0.1:8000/api';
 
@@ -10,6 +11,8 @@ const VideoUploadForm = ({ isOpen, onClose, familyMemberId, onSuccess }) => {
   const [thumbnailFile, setThumbnailFile] = useState(null);
   const [uploading, setUploading] = useState(false);
   const [error, setError] = useState('');
+  // Kept across a retry after a network failure, so the server doesn't redo the work
+  const idempotencyKey = useRef(null);
   const [statusMessage, setStatusMessage] = useState('');
   const [uploadProgress, setUploadProgress] = useState(0);
 
@@ -80,10 +83,12 @@ const VideoUploadForm = ({ isOpen, onClose, familyMemberId, onSuccess }) => {
         setUploadProgress(prev => Math.min(prev + 10, 90));
       }, 500);
 
-      const response = await fetch(`${API_BASE}/upload-video/`, {
-        method: 'POST',
-        body: formData,
-      });
+      if (!idempotencyKey.current) {
+        idempotencyKey.current = crypto.randomUUID();
+      }
+      const response = await postIdempotent(`${API_BASE}/upload-video/`, idempotencyKey.current, formData);
+      // The server answered - the next submit is a new request
+      idempotencyKey.current = null;
 
       clearInterval(progressInterval);
       setUploadProgress(100);
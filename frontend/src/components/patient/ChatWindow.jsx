@@ -70,23 +70,72 @@ const ChatWindow = ({ patientId }) => {
     setLoading(true);
 
     try {
-      const response = await fetch(`${API_BASE}/query/`, {
+      const response = await fetch(`${API_BASE}/query/stream/`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ patient_id: patientId, query: userMessage })
       });
 
-      const data = await response.json();
-      if (!response.ok) throw new Error(data.error || 'Query failed');
+      if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.error || 'Query failed');
+      }
 
-      setMessages(prev => [...prev, {
-        id: Date.now() + 1,
-        type: 'ai',
-        responseType: data.type,
-        content: data.answer,
-        data: data,
-        timestamp: new Date()
-      }]);
+      // Server-sent events: the reply shows up with the first event (type and
+      // member card), then the answer fills in as it is generated
+      const messageId = Date.now() + 1;
+      let started = false;
+      const updateMessage = (update) => setMessages(prev => prev.map(msg => (
+        msg.id === messageId ? { ...msg, ...update(msg) } : msg
+      )));
+
+      const handleEvent = (event, data) => {
+        if (!started) {
+          started = true;
+          setLoading(false);
+          setMessages(prev => [...prev, {
+            id: messageId,
+            type: 'ai',
+            responseType: data.type,
+            content: data.answer || '',
+            data: data,
+            timestamp: new Date()
+          }]);
+          return;
+        }
+        if (event === 'answer') {
+          updateMessage(msg => ({ content: msg.content + data.text }));
+        } else if (event === 'memories') {
+          updateMessage(msg => ({ data: { ...msg.data, memories: data.memories } }));
+        } else if (event === 'done') {
+          updateMessage(() => ({ content: data.answer }));
+        } else if (event === 'error') {
+          updateMessage(() => ({ responseType: 'error', content: data.answer }));
+        }
+      };
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const blocks = buffer.split('\n\n');
+        buffer = blocks.pop();
+        for (const block of blocks) {
+          const lines = block.split('\n');
+          const event = lines.find(line => line.startsWith('event:'))?.slice(6).trim();
+          // A value may span several data: lines - they join with newlines
+          const dataLines = lines.filter(line => line.startsWith('data:')).map(line => line.slice(5).replace(/^ /, ''));
+          if (event && dataLines.length) handleEvent(event, JSON.parse(dataLines.join('\n')));
+        }
+      }
+
+      if (!started) {
+        // Stream closed before the first event (server error, dropped connection)
+        throw new Error('No reply received');
+      }
 
     } catch (err) {
       console.error('Chat error:', err);
@@ -253,7 +302,7 @@ const MessageBubble = ({ message }) => {
           <div className="mt-2 p-3 bg-white rounded-lg border border-gray-200">
             <div className="flex items-center gap-3">
               {message.data.family_member.profile_photo_url ? (
-                <img src={message.data.family_member.profile_photo_url} alt="" className="w-12 h-12 rounded-full object-cover" />
+                <img src={message.data.family_member.profile_photo_thumb_url || message.data.family_member.profile_photo_url} alt="" className="w-12 h-12 rounded-full object-cover" />
               ) : (
                 <div className="w-12 h-12 rounded-full bg-gradient-to-br from-green-400 to-blue-500 flex items-center justify-center">
                   <User className="w-6 h-6 text-white" />
@@ -292,7 +341,7 @@ const MessageBubble = ({ message }) => {
             {message.data.family_members.map((member) => (
               <div key={member.id} className="flex items-center gap-2 p-2 bg-white rounded-lg border border-gray-200">
                 {member.profile_photo_url ? (
-                  <img src={member.profile_photo_url} alt="" className="w-8 h-8 rounded-full object-cover" />
+                  <img src={member.profile_photo_thumb_url || member.profile_photo_url} alt="" className="w-8 h-8 rounded-full object-cover" />
                 ) : (
                   <div className="w-8 h-8 rounded-full bg-gradient-to-br from-purple-400 to-pink-500 flex items-center justify-center">
                     <User className="w-4 h-4 text-white" />
@@ -320,7 +369,7 @@ const MemoryCard = ({ memory }) => {
       {memory.photos?.length > 0 && (
         <div className="grid grid-cols-3 gap-1 mb-2">
           {memory.photos.slice(0, 3).map((photo, idx) => (
-            <img key={idx} src={photo.photo_url} alt="" className="w-full h-16 object-cover rounded" />
+            <img key={idx} src={photo.thumb_url || photo.photo_url} alt="" className="w-full h-16 object-cover rounded" />
           ))}
         </div>
       )}
@@ -0,0 +1,17 @@
+// POST with an Idempotency-Key. A 409 means the first attempt with this key
+// is still running on the server - wait as long as it asks, then ask again
+// with the same key (a new key would run the operation twice).
+export const postIdempotent = async (url, key, body) => {
+  for (;;) {
+    const response = await fetch(url, {
+      method: 'POST',
+      headers: { 'Idempotency-Key': key },
+      body,
+    });
+    if (response.status !== 409) {
+      return response;
+    }
+    const seconds = Number(response.headers.get('Retry-After')) || 2;
+    await new Promise((resolve) => setTimeout(resolve, seconds * 1000));
+  }
+};
@@ -0,0 +1,34 @@
+-- Row versions for conditional GET (ETag / Last-Modified) on read endpoints.
+-- Every table served by the API gets an updated_at column that is bumped
+-- on each UPDATE, so a cheap `select id, updated_at` identifies a version.
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+alter table public.family_members add column if not exists updated_at timestamptz not null default now();
+alter table public.memories       add column if not exists updated_at timestamptz not null default now();
+alter table public.memory_photos  add column if not exists updated_at timestamptz not null default now();
+alter table public.family_videos  add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists family_members_updated_at on public.family_members;
+create trigger family_members_updated_at before update on public.family_members
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists memories_updated_at on public.memories;
+create trigger memories_updated_at before update on public.memories
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists memory_photos_updated_at on public.memory_photos;
+create trigger memory_photos_updated_at before update on public.memory_photos
+    for each row execute function public.set_updated_at();
+
+drop trigger if exists family_videos_updated_at on public.family_videos;
+create trigger family_videos_updated_at before update on public.family_videos
+    for each row execute function public.set_updated_at();
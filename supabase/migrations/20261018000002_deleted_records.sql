@@ -0,0 +1,58 @@
+-- Tombstones for delta sync. Deletes made anywhere (API views, the
+-- frontend's direct Supabase calls, cascades) are recorded with the owning
+-- patient so /api/sync/ can tell devices which local rows to drop.
+
+create table if not exists public.deleted_records (
+    id bigserial primary key,
+    table_name text not null,
+    record_id uuid not null,
+    patient_id uuid,
+    deleted_at timestamptz not null default now()
+);
+
+create index if not exists deleted_records_patient_deleted_at
+    on public.deleted_records (patient_id, deleted_at);
+
+create or replace function public.record_deletion()
+returns trigger
+language plpgsql
+as $$
+declare
+    owner uuid;
+begin
+    if tg_table_name = 'family_members' or tg_table_name = 'family_videos' then
+        owner := old.patient_id;
+    elsif tg_table_name = 'memories' then
+        select fm.patient_id into owner
+        from public.family_members fm
+        where fm.id = old.family_member_id;
+    elsif tg_table_name = 'memory_photos' then
+        -- May be null when the photo goes with a cascaded memory delete;
+        -- devices drop a memory's photos together with the memory.
+        select fm.patient_id into owner
+        from public.memories m
+        join public.family_members fm on fm.id = m.family_member_id
+        where m.id = old.memory_id;
+    end if;
+
+    insert into public.deleted_records (table_name, record_id, patient_id)
+    values (tg_table_name, old.id, owner);
+    return old;
+end;
+$$;
+
+drop trigger if exists family_members_deleted on public.family_members;
+create trigger family_members_deleted after delete on public.family_members
+    for each row execute function public.record_deletion();
+
+drop trigger if exists memories_deleted on public.memories;
+create trigger memories_deleted before delete on public.memories
+    for each row execute function public.record_deletion();
+
+drop trigger if exists memory_photos_deleted on public.memory_photos;
+create trigger memory_photos_deleted before delete on public.memory_photos
+    for each row execute function public.record_deletion();
+
+drop trigger if exists family_videos_deleted on public.family_videos;
+create trigger family_videos_deleted after delete on public.family_videos
+    for each row execute function public.record_deletion();
@@ -0,0 +1,10 @@
+-- Resized photo variants generated at upload time (WebP by default).
+-- photo_url / profile_photo_url stay the untouched originals; galleries
+-- show thumb_url first and load screen_url or the original on demand.
+-- Null variant columns mean "not generated yet" - fall back to the original.
+
+alter table public.memory_photos add column if not exists thumb_url text;
+alter table public.memory_photos add column if not exists screen_url text;
+
+alter table public.family_members add column if not exists profile_photo_thumb_url text;
+alter table public.family_members add column if not exists profile_photo_screen_url text;
@@ -0,0 +1,13 @@
+-- Precomputed "today" documents for the patient app (one per patient per day),
+-- written by `manage.py build_daily_bundles` and read at first open.
+
+create table if not exists public.daily_bundles (
+    patient_id  uuid not null references public.patients (id) on delete cascade,
+    bundle_date date not null,
+    bundle      jsonb not null,
+    created_at  timestamptz not null default now(),
+    primary key (patient_id, bundle_date)
+);
+
+-- Old bundles are only kept for a short history
+create index if not exists daily_bundles_date_idx on public.daily_bundles (bundle_date);
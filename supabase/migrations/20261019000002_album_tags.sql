@@ -0,0 +1,25 @@
+-- Album photos tagged with the family members found in them (batch
+-- tagging endpoint). One photo_tags row per detected face; family_member_id
+-- is null for faces that didn't match anyone.
+
+create table if not exists public.album_photos (
+    id          uuid primary key default gen_random_uuid(),
+    patient_id  uuid not null references public.patients (id) on delete cascade,
+    photo_url   text not null,
+    thumb_url   text,
+    screen_url  text,
+    created_at  timestamptz not null default now()
+);
+
+create table if not exists public.photo_tags (
+    id                uuid primary key default gen_random_uuid(),
+    album_photo_id    uuid not null references public.album_photos (id) on delete cascade,
+    family_member_id  uuid references public.family_members (id) on delete set null,
+    box               jsonb,          -- {x, y, width, height} as fractions of the image
+    confidence        text,
+    created_at        timestamptz not null default now()
+);
+
+create index if not exists album_photos_patient_idx on public.album_photos (patient_id, created_at desc);
+create index if not exists photo_tags_member_idx on public.photo_tags (family_member_id);
+create index if not exists photo_tags_photo_idx on public.photo_tags (album_photo_id);
@@ -0,0 +1,89 @@
+-- Delta sync fixes.
+--
+-- 1. Stamp rows with clock_timestamp() instead of now(). now() is the
+--    transaction start, so every row of a bulk write shares one value and a
+--    long transaction can commit with stamps older than a cursor that has
+--    already moved past them. The API pages on (updated_at, id) /
+--    (deleted_at, id), so equal stamps are no longer skipped either.
+-- 2. Tombstones for rows removed by a cascade. Cascaded deletes run after
+--    the parent row is gone, so the patient can't be looked up from the
+--    child any more. The parent's BEFORE DELETE trigger now records its
+--    children while they are still reachable, and tombstones that would
+--    have no patient (never visible to a device) are skipped.
+
+create or replace function public.set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at = clock_timestamp();
+    return new;
+end;
+$$;
+
+alter table public.family_members alter column updated_at set default clock_timestamp();
+alter table public.memories       alter column updated_at set default clock_timestamp();
+alter table public.memory_photos  alter column updated_at set default clock_timestamp();
+alter table public.family_videos  alter column updated_at set default clock_timestamp();
+alter table public.deleted_records alter column deleted_at set default clock_timestamp();
+
+create index if not exists family_members_updated_at_id on public.family_members (updated_at, id);
+create index if not exists memories_updated_at_id       on public.memories (updated_at, id);
+create index if not exists memory_photos_updated_at_id  on public.memory_photos (updated_at, id);
+create index if not exists family_videos_updated_at_id  on public.family_videos (updated_at, id);
+
+create or replace function public.record_deletion()
+returns trigger
+language plpgsql
+as $$
+declare
+    owner uuid;
+begin
+    if tg_table_name = 'family_members' or tg_table_name = 'family_videos' then
+        owner := old.patient_id;
+    elsif tg_table_name = 'memories' then
+        select fm.patient_id into owner
+        from public.family_members fm
+        where fm.id = old.family_member_id;
+    elsif tg_table_name = 'memory_photos' then
+        select fm.patient_id into owner
+        from public.memories m
+        join public.family_members fm on fm.id = m.family_member_id
+        where m.id = old.memory_id;
+    end if;
+
+    -- Parent already gone: the parent's trigger recorded this row
+    if owner is null then
+        return old;
+    end if;
+
+    insert into public.deleted_records (table_name, record_id, patient_id)
+    values (tg_table_name, old.id, owner);
+
+    -- Children about to be removed by the cascade, while they still resolve
+    if tg_table_name = 'family_members' then
+        insert into public.deleted_records (table_name, record_id, patient_id)
+        select 'memories', m.id, owner
+        from public.memories m
+        where m.family_member_id = old.id;
+
+        insert into public.deleted_records (table_name, record_id, patient_id)
+        select 'memory_photos', p.id, owner
+        from public.memory_photos p
+        join public.memories m on m.id = p.memory_id
+        where m.family_member_id = old.id;
+    elsif tg_table_name = 'memories' then
+        insert into public.deleted_records (table_name, record_id, patient_id)
+        select 'memory_photos', p.id, owner
+        from public.memory_photos p
+        where p.memory_id = old.id;
+    end if;
+
+    return old;
+end;
+$$;
+
+-- Before delete, so the member's memories and photos are still there
+drop trigger if exists family_members_deleted on public.family_members;
+create trigger family_members_deleted before delete on public.family_members
+    for each row execute function public.record_deletion();
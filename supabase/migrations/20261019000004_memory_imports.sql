@@ -0,0 +1,19 @@
+-- Bulk memory import jobs. Progress used to live in the Django cache only,
+-- so a restart left an import "running" forever; the worker now heartbeats
+-- its jobs here and stale ones are marked failed.
+
+create table if not exists public.memory_imports (
+    id           uuid primary key,
+    status       text not null default 'queued'
+                 check (status in ('queued', 'running', 'completed', 'failed')),
+    progress     jsonb not null default '{}'::jsonb,
+    error        text,  -- set when the stale sweep fails the job
+    worker       text not null,
+    heartbeat_at timestamptz not null default now(),
+    created_at   timestamptz not null default now()
+);
+
+-- Stale sweep: unfinished jobs by heartbeat
+create index if not exists memory_imports_unfinished_idx
+    on public.memory_imports (heartbeat_at)
+    where status in ('queued', 'running');